@@ -0,0 +1,139 @@
+import hashlib
+import os
+import subprocess
+import sys
+
+import numpy as np
+from whisper.audio import SAMPLE_RATE
+
+# Parâmetros da decodificação; entram na chave, então mudar qualquer um invalida o cache
+DECODE_PARAMS = f"f32le/{SAMPLE_RATE}/mono"
+SUFFIX = ".f32"
+PART_SUFFIX = ".part"
+
+SAMPLE_BLOCK = 64 * 1024
+SAMPLE_POINTS = 16
+
+# Tamanho máximo do cache; EASY_SUBTITLER_AUDIO_CACHE_MB sobrepõe (2 h de áudio ≈ 460 MB)
+DEFAULT_MAX_MB = int(os.environ.get("EASY_SUBTITLER_AUDIO_CACHE_MB", 8192))
+
+
+def default_cache_dir():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "easy-subtitler", "audio")
+
+
+def content_hash(path):
+    """
+    Hash do tamanho e de blocos espalhados pelo arquivo (início, fim e 16
+    pontos no meio): identifica o vídeo mesmo renomeado ou movido, lendo ~1 MB.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(path, 'rb') as f:
+        for i in range(SAMPLE_POINTS + 1):
+            f.seek(max(0, min(size - SAMPLE_BLOCK, size * i // SAMPLE_POINTS)))
+            digest.update(f.read(SAMPLE_BLOCK))
+    return digest.hexdigest()
+
+
+def map_pcm(path):
+    # 'c' (cópia na escrita): o torch aceita o array sem reclamar de buffer só leitura
+    return np.memmap(path, dtype=np.float32, mode='c')
+
+
+class AudioCache:
+    """
+    Áudio já decodificado (16 kHz mono float32 cru), endereçado pelo conteúdo
+    do vídeo e pelos parâmetros de decodificação. Trocar de modelo ou rodar
+    de novo abre o arquivo com mmap em vez de chamar o ffmpeg. Passando do
+    tamanho máximo, sai o usado há mais tempo.
+    """
+
+    def __init__(self, root=None, max_mb=DEFAULT_MAX_MB):
+        self.root = os.path.abspath(root or default_cache_dir())
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, path):
+        return hashlib.blake2b(f"{content_hash(path)}/{DECODE_PARAMS}".encode(), digest_size=20).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.root, key + SUFFIX)
+
+    def contains(self, path, key=None):
+        return os.path.exists(self.path_for(key or self.key(path)))
+
+    def load(self, path, key=None):
+        """
+        np.memmap float32 do áudio, decodificando só na primeira vez. Quem já
+        tem a chave passa `key` e evita ler o vídeo de novo para o hash.
+        """
+        pcm_path = self.path_for(key or self.key(path))
+        try:
+            os.utime(pcm_path)  # marca o uso para o LRU
+        except FileNotFoundError:
+            self._decode(path, pcm_path)
+            self.evict(keep=pcm_path)
+        if os.path.getsize(pcm_path) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return map_pcm(pcm_path)
+
+    def _decode(self, path, pcm_path):
+        tmp = f"{pcm_path}.{os.getpid()}{PART_SUFFIX}"
+        cmd = [
+            "ffmpeg", "-nostdin", "-y", "-threads", "0", "-i", path,
+            "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", "-acodec", "pcm_f32le", tmp
+        ]
+
+        startupinfo = None
+        if sys.platform == "win32":
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+        try:
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True,
+                           startupinfo=startupinfo)
+            os.replace(tmp, pcm_path)
+        except subprocess.CalledProcessError as e:
+            err = e.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise RuntimeError(f"Falha ao extrair áudio: {err[-1] if err else e}") from None
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def entries(self):
+        """
+        [(caminho, bytes, último uso)] do mais antigo ao mais recente.
+        """
+        found = []
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name.endswith(SUFFIX):
+                    st = entry.stat()
+                    found.append((entry.path, st.st_size, st.st_mtime))
+        return sorted(found, key=lambda e: e[2])
+
+    def usage(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        used = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if used <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # no Windows, arquivo ainda mapeado por outro job
+            used -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,243 @@
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import whisper
+from whisper.audio import SAMPLE_RATE
+
+from audiocache import map_pcm
+from modelpool import DEFAULT_BUDGET_MB, MODEL_SIZES_MB
+
+FRAME_SECONDS = 0.03
+MIN_SILENCE_SECONDS = 0.4
+# Tamanho alvo de cada trecho; o corte cai no silêncio mais próximo do alvo
+DEFAULT_CHUNK_SECONDS = 180
+MIN_CHUNK_SECONDS = 60
+MAX_CHUNK_SECONDS = 360
+# Silêncio mantido antes e depois da fala de cada trecho; o resto não vai para o modelo
+EDGE_PAD_SECONDS = 0.5
+
+# Threads de torch por processo: poucos processos com muitas threads escalam
+# mal no encoder; muitos processos de 2 threads ficam perto do linear
+DEFAULT_THREADS = 2
+# RAM por processo além dos pesos (torch, buffers de decodificação)
+WORKER_OVERHEAD_MB = 600
+
+
+def load_audio(source):
+    """
+    Áudio mono 16 kHz float32: decodifica se for caminho, senão usa o array.
+    """
+    if isinstance(source, str):
+        return whisper.load_audio(source)
+    return np.asanyarray(source, dtype=np.float32)
+
+
+def speech_mask(audio, frame_seconds=FRAME_SECONDS):
+    """
+    VAD por energia: True nos quadros com fala. O limiar se adapta ao ruído
+    de fundo (percentil 10) e ao volume da fala (percentil 95) de cada arquivo.
+    """
+    frame = int(SAMPLE_RATE * frame_seconds)
+    count = len(audio) // frame
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    frames = audio[:count * frame].reshape(count, frame)
+    db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    floor, peak = np.percentile(db, 10), np.percentile(db, 95)
+    threshold = floor + max(6.0, (peak - floor) * 0.3)
+    return db > threshold
+
+
+def find_chunks(audio, chunk_seconds=DEFAULT_CHUNK_SECONDS, min_seconds=MIN_CHUNK_SECONDS,
+                max_seconds=MAX_CHUNK_SECONDS, min_silence=MIN_SILENCE_SECONDS):
+    """
+    Divide o áudio em silêncios. Retorna [(início, fim)] em amostras, só dos
+    trechos que têm fala, sem o silêncio das pontas. Sem silêncio no
+    intervalo permitido, corta no quadro mais baixo entre o alvo e o máximo.
+    """
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    speech = speech_mask(audio)
+    total = len(speech)
+    if total == 0:
+        return []
+
+    # Meio de cada silêncio longo o bastante, em quadros
+    padded = np.concatenate(([True], speech, [True])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[0::2], edges[1::2]
+    long_enough = (ends - starts) >= int(min_silence / FRAME_SECONDS)
+    cuts = ((starts + ends) // 2)[long_enough]
+
+    to_frames = 1 / FRAME_SECONDS
+    target, lo, hi = (int(s * to_frames) for s in (chunk_seconds, min_seconds, max_seconds))
+    chunks, start = [], 0
+    while total - start > hi:
+        window = cuts[(cuts >= start + lo) & (cuts <= start + hi)]
+        if len(window):
+            cut = int(window[np.argmin(np.abs(window - (start + target)))])
+        else:
+            frames = audio[(start + target) * frame:(start + hi) * frame]
+            energy = np.mean(frames[:len(frames) // frame * frame].reshape(-1, frame) ** 2, axis=1)
+            cut = start + target + int(np.argmin(energy))
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+
+    pad = int(EDGE_PAD_SECONDS * to_frames)
+    trimmed = []
+    for s, e in chunks:
+        voiced = np.flatnonzero(speech[s:e])
+        if len(voiced) == 0:
+            continue
+        first, last = max(s, s + int(voiced[0]) - pad), min(e, s + int(voiced[-1]) + 1 + pad)
+        trimmed.append((first * frame, len(audio) if last == total else last * frame))
+    return trimmed
+
+
+def stitch(parts):
+    """
+    Junta [(offset em segundos, resultado do Whisper)] num resultado único,
+    no mesmo formato de model.transcribe.
+    """
+    segments, texts, languages = [], [], Counter()
+    for offset, result in sorted(parts, key=lambda part: part[0]):
+        for segment in result.get('segments', []):
+            segment = dict(segment, id=len(segments),
+                           start=float(segment['start'] + offset), end=float(segment['end'] + offset))
+            if 'words' in segment:
+                segment['words'] = [dict(w, start=float(w['start'] + offset), end=float(w['end'] + offset))
+                                    for w in segment['words']]
+            segments.append(segment)
+        texts.append(result.get('text', ''))
+        languages[result.get('language')] += len(result.get('text', ''))
+    language = languages.most_common(1)[0][0] if languages else None
+    return {'text': ''.join(texts), 'segments': segments, 'language': language}
+
+
+# --- Processos do pool: cada um carrega o próprio modelo uma vez ---
+_model = None
+
+
+def _init_worker(model_name, threads):
+    global _model
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    _model = whisper.load_model(model_name, device="cpu")
+
+
+def _chunk_audio(audio):
+    # (arquivo do cache, início, fim): o processo mapeia o trecho em vez de receber uma cópia
+    if isinstance(audio, tuple):
+        path, start, end = audio
+        return map_pcm(path)[start:end]
+    return audio
+
+
+def _detect_language(audio):
+    audio = _chunk_audio(audio)
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), _model.dims.n_mels).to(_model.device)
+    _, probs = _model.detect_language(mel)
+    return max(probs, key=probs.get)
+
+
+def _transcribe_chunk(audio, offset, options):
+    return offset, _model.transcribe(_chunk_audio(audio), fp16=False, **options)
+
+
+class ChunkedTranscriber:
+    """
+    Transcrição de gravações longas em paralelo: corta o áudio nos silêncios
+    e manda cada trecho para um processo com poucas threads. O número de
+    processos respeita os núcleos e o orçamento de RAM dos modelos. O pool
+    fica vivo entre arquivos; use com `with` ou chame close().
+    """
+
+    def __init__(self, model_name, workers=None, threads=DEFAULT_THREADS,
+                 chunk_seconds=DEFAULT_CHUNK_SECONDS, budget_mb=DEFAULT_BUDGET_MB):
+        self.model_name = model_name
+        self.threads = max(1, threads)
+        self.chunk_seconds = chunk_seconds
+        if workers is None:
+            by_cpu = (os.cpu_count() or 1) // self.threads
+            by_ram = budget_mb // (MODEL_SIZES_MB.get(model_name, 1000) + WORKER_OVERHEAD_MB)
+            workers = min(by_cpu, by_ram)
+        self.workers = max(1, workers)
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn: fork de um processo com torch e Qt já inicializados trava
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.model_name, self.threads))
+        return self._pool
+
+    def transcribe(self, source, on_chunk=None, should_stop=None, skip=(), on_part=None, **options):
+        """
+        Mesmo retorno de model.transcribe. source pode ser caminho, array ou
+        o memmap do AudioCache (os processos abrem o mesmo arquivo). on_chunk(feitos, total) a cada
+        trecho concluído; should_stop() interrompe e retorna None. Os trechos
+        (início, fim) em skip já estão prontos (checkpoint) e não rodam;
+        on_part(início, fim, resultado cru) recebe cada trecho novo.
+        """
+        try:
+            return self._transcribe(source, on_chunk, should_stop, skip, on_part, **options)
+        except BrokenProcessPool:
+            # Um processo morreu (ex.: OOM ao carregar o modelo); o próximo arquivo abre um pool novo
+            self.close()
+            raise
+
+    def _transcribe(self, source, on_chunk=None, should_stop=None, skip=(), on_part=None, **options):
+        audio = load_audio(source)
+        all_chunks = find_chunks(audio, self.chunk_seconds)
+        chunks = [chunk for chunk in all_chunks if chunk not in skip]
+        if not chunks:
+            return {'text': '', 'segments': [], 'language': options.get('language')}
+
+        mapped = audio.filename if isinstance(audio, np.memmap) else None
+
+        def piece(start, end):
+            return (mapped, start, end) if mapped else audio[start:end]
+
+        pool = self._executor()
+        if not options.get('language'):
+            # Um idioma só para todos os trechos, detectado no que tem mais fala
+            options['language'] = pool.submit(_detect_language, piece(*max(chunks, key=lambda c: c[1] - c[0]))).result()
+
+        bounds = {pool.submit(_transcribe_chunk, piece(start, end), start / SAMPLE_RATE, options): (start, end)
+                  for start, end in chunks}
+        pending = set(bounds)
+        parts = []
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                # Trechos prontos são entregues antes de checar o cancelamento
+                for future in done:
+                    parts.append(future.result())
+                    if on_part is not None:
+                        on_part(*bounds[future], parts[-1][1])
+                if done and on_chunk is not None:
+                    on_chunk(len(all_chunks) - len(chunks) + len(parts), len(all_chunks))
+                if should_stop is not None and should_stop():
+                    return None
+        finally:
+            for future in pending:
+                future.cancel()
+
+        return stitch(parts)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,12 +1,21 @@
 import sys
 import os
-import time
-import subprocess
 import traceback
 import ssl
 import re
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from datetime import timedelta, datetime
-import whisper
+from whisper.audio import SAMPLE_RATE
+
+from audiocache import AudioCache
+from modelpool import ModelPool
+from render import FFmpegCancelled, SegmentedRender
+from resultcache import ResultCache
+from streaming import CHECKPOINT_MIN_SECONDS, PartialTranscript, StreamingTranscriber
+from chunked import ChunkedTranscriber
 
 # --- CORREÇÃO DE SSL PARA MACOS ---
 try:
@@ -22,7 +31,8 @@ from PyQt6.QtGui import QFont, QIcon, QPalette, QColor, QAction, QDragEnterEvent
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
     QFileDialog, QWidget, QComboBox, QSpinBox, QProgressBar, QFrame, 
-    QMessageBox, QGraphicsDropShadowEffect, QSizePolicy, QScrollArea
+    QMessageBox, QGraphicsDropShadowEffect, QSizePolicy, QScrollArea, QCheckBox,
+    QListWidget, QListWidgetItem
 )
 
 # --- CONFIGURAÇÃO DE ESTILO (CSS MODERN) ---
@@ -46,6 +56,7 @@ MODERN_STYLESHEET = """
     QPushButton#PrimaryButton:disabled { background-color: #2C2C2C; color: #555555; }
     QPushButton#DangerButton { background-color: #C42B1C; border: none; }
     QPushButton#DangerButton:hover { background-color: #B00020; }
+    QListWidget { background-color: #252526; border: 1px solid #333333; border-radius: 8px; padding: 4px; }
     QProgressBar { border: none; background-color: #2D2D2D; border-radius: 4px; height: 8px; text-align: center; }
     QProgressBar::chunk { background-color: #0078D4; border-radius: 4px; }
 """
@@ -199,112 +210,329 @@ class SRTProcessor:
 
 
 # --- WORKER THREAD ---
+def output_paths(file_path):
+    """
+    SRT e vídeo legendado ficam ao lado do arquivo de origem.
+    """
+    folder = os.path.dirname(file_path)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(folder, f"{base_name}.srt"), os.path.join(folder, f"{base_name}_legendado.mp4")
+
+
 class TranscriptionWorker(QThread):
     status_update = pyqtSignal(str)
     progress_update = pyqtSignal(int)
+    job_update = pyqtSignal(int, str)
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, config):
+    def __init__(self, config, jobs, model_pool=None, audio_cache=None, result_cache=None):
         super().__init__()
         self.config = config
+        # Cada job: {'file_path', 'srt_path', 'video_path'}; o resto da config é comum a todos
+        self.jobs = jobs
+        # Modelos carregados ficam no pool entre um job e outro
+        self.model_pool = model_pool or ModelPool()
+        # Áudio decodificado uma vez por vídeo, reaproveitado ao trocar de modelo
+        self.audio_cache = audio_cache or AudioCache()
+        # Resultados do Whisper: mudar só o estilo da legenda não roda o modelo de novo
+        self.result_cache = result_cache or ResultCache()
         self._is_running = True
+        self._lock = threading.Lock()
+        self._done_steps = 0
+        # Fração já feita do passo em andamento: transcrição e render correm juntos
+        self._partial = {'transcription': 0.0, 'render': 0.0}
+        self._renders = set()
+        self._errors = 0
+
+    def _emit_progress(self):
+        steps_per_job = 2 if self.config['generate_video'] else 1
+        total = len(self.jobs) * steps_per_job
+        self.progress_update.emit(5 + int((self._done_steps + sum(self._partial.values())) / total * 95))
+
+    def _step_done(self, part):
+        with self._lock:
+            self._done_steps += 1
+            self._partial[part] = 0.0
+            self._emit_progress()
+
+    def _partial_progress(self, part, done, total):
+        # Segundos de áudio, trechos ou segundos de vídeo renderizados
+        with self._lock:
+            self._partial[part] = min(1.0, done / total) if total else 0.0
+            self._emit_progress()
+
+    def _render_job(self, idx, job):
+        # Roda na thread de render, enquanto o worker já transcreve o próximo arquivo
+        try:
+            self._render_video(idx, job)
+            self.job_update.emit(idx, "✅ Pronto")
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            if self._is_running:
+                # A cauda do stderr vai inteira para o console; na lista, só a última linha
+                traceback.print_exc()
+                self.job_update.emit(idx, f"❌ Erro no render: {str(e).splitlines()[-1] if str(e) else e}")
+            else:
+                self.job_update.emit(idx, "⛔ Cancelado")
+        self._step_done('render')
+
+    def _load_audio(self, idx, job, audio_key):
+        name = os.path.basename(job['file_path'])
+        if not self.audio_cache.contains(job['file_path'], audio_key):
+            self.status_update.emit(f"🔊 Extraindo áudio {idx + 1}/{len(self.jobs)}: {name}")
+        audio = self.audio_cache.load(job['file_path'], audio_key)
+        self.status_update.emit(f"🎙️ Transcrevendo {idx + 1}/{len(self.jobs)}: {name}")
+        return audio
+
+    @contextmanager
+    def _transcriber(self, model_name):
+        """
+        Fornece transcribe(idx, job, chave do áudio, chave do resultado). No modo paralelo os trechos vão para um
+        pool de processos; senão o modelo vem do pool e fica em uso até o fim.
+        """
+        if self.config.get('parallel'):
+            self.status_update.emit(f"🚀 Iniciando transcrição paralela com '{model_name}'...")
+            with ChunkedTranscriber(model_name) as engine:
+                yield lambda idx, job, audio_key, key: self._parallel(engine, idx, job, audio_key, key)
+            return
+
+        if self.model_pool.is_loaded(model_name):
+            self.status_update.emit(f"⚡ Modelo '{model_name}' já está em memória")
+        else:
+            self.status_update.emit(f"🚀 Carregando modelo Whisper '{model_name}'...")
+        self.model_pool.get(model_name)
+        # Em uso: o pool não descarta o modelo no meio da fila
+        with self.model_pool.use(model_name) as model:
+            if self.config.get('streaming'):
+                yield lambda idx, job, audio_key, key: self._stream(model, idx, job, audio_key, key)
+            else:
+                yield lambda idx, job, audio_key, key: self._default(model, idx, job, audio_key, key)
+
+    def _checkpoint(self, job, key, total):
+        """
+        Checkpoint ao lado do SRT: retoma o desta chave ou começa um novo.
+        """
+        checkpoint = PartialTranscript(job['srt_path'])
+        if checkpoint.load(key) and checkpoint.windows:
+            done = self._fmt_time_simple(checkpoint.done_seconds())[:8]
+            self.status_update.emit(f"↩️ Retomando {os.path.basename(job['file_path'])}: {done} já transcritos")
+        else:
+            checkpoint.start(key, total)
+        return checkpoint
+
+    def _default(self, model, idx, job, audio_key, key):
+        # Curto: uma chamada só, como sempre. Longo: em janelas com checkpoint,
+        # para um cancelamento ou crash não perder horas de transcrição
+        audio = self._load_audio(idx, job, audio_key)
+        if len(audio) / SAMPLE_RATE <= CHECKPOINT_MIN_SECONDS:
+            return model.transcribe(audio, word_timestamps=True)
+        return self._stream(model, idx, job, audio_key, key)
+
+    def _parallel(self, engine, idx, job, audio_key, key):
+        audio = self._load_audio(idx, job, audio_key)
+        name = os.path.basename(job['file_path'])
+        checkpoint = self._checkpoint(job, key, len(audio) / SAMPLE_RATE)
+
+        def on_chunk(done, total):
+            self.status_update.emit(f"🎙️ Transcrevendo {idx + 1}/{len(self.jobs)}: {name} (trecho {done}/{total})")
+            self._partial_progress('transcription', done, total)
+
+        options = {'language': checkpoint.language} if checkpoint.language else {}
+        result = engine.transcribe(audio, on_chunk=on_chunk, should_stop=lambda: not self._is_running,
+                                   skip=set(checkpoint.windows), on_part=checkpoint.add,
+                                   word_timestamps=True, **options)
+        if result is None:
+            return None
+        result = checkpoint.result()
+        checkpoint.remove()
+        return result
+
+    def _stream(self, model, idx, job, audio_key, key):
+        """
+        Transcrição em janelas: o SRT cresce a cada janela e o checkpoint ao
+        lado dele guarda segmentos e contexto. Cancelado (None) ou depois de um
+        crash, rodar de novo com as mesmas opções continua de onde parou.
+        """
+        audio = self._load_audio(idx, job, audio_key)
+        total = len(audio) / SAMPLE_RATE
+        name = os.path.basename(job['file_path'])
+        checkpoint = self._checkpoint(job, key, total)
+        self._partial_progress('transcription', max((end for _, end in checkpoint.windows), default=0) / SAMPLE_RATE,
+                               total)
+
+        with open(job['srt_path'], 'w', encoding='utf-8') as srt:
+            counter = self._write_cues(srt, self._cues(checkpoint.segments()), 1)
+
+            def on_window(start, end, result, prompt):
+                nonlocal counter
+                # Checkpoint primeiro: se cair entre os dois, o SRT é refeito dele
+                segments = checkpoint.add(start, end, result, prompt)
+                counter = self._write_cues(srt, self._cues(segments), counter)
+                srt.flush()
+                seconds = end / SAMPLE_RATE
+                self.status_update.emit(f"🎙️ Transcrevendo {idx + 1}/{len(self.jobs)}: {name} "
+                                        f"({self._fmt_time_simple(seconds)[:8]} de {self._fmt_time_simple(total)[:8]})")
+                self._partial_progress('transcription', seconds, total)
+
+            finished = StreamingTranscriber(model).transcribe(
+                audio, on_window, done=checkpoint.windows, language=checkpoint.language,
+                prompt=checkpoint.prompt, should_stop=lambda: not self._is_running, word_timestamps=True)
+        if not finished:
+            return None
+
+        result = checkpoint.result()
+        checkpoint.remove()
+        return result
+
+    def _transcribe_options(self):
+        # Tudo que muda a saída do Whisper; estilo e máx. de caracteres ficam de fora
+        return {'word_timestamps': True, 'parallel': bool(self.config.get('parallel')),
+                'streaming': bool(self.config.get('streaming')) and not self.config.get('parallel')}
 
     def run(self):
         try:
-            self.status_update.emit(f"🚀 Carregando modelo Whisper '{self.config['model']}'...")
+            model_name = self.config['model']
+            options = self._transcribe_options()
             self.progress_update.emit(5)
-            
+            transcriber = ExitStack()
+            transcribe = None
+            load_error = None
+
+            # Um render por vez (já ocupa a CPU), sobreposto à transcrição do próximo
+            renders = ThreadPoolExecutor(max_workers=1)
             try:
-                model = whisper.load_model(self.config['model'])
-            except Exception as e:
-                self.finished.emit(False, f"Erro ao carregar modelo.\n{str(e)}")
+                with transcriber:
+                    for idx, job in enumerate(self.jobs):
+                        if not self._is_running:
+                            break
+                        self.job_update.emit(idx, "🎙️ Transcrevendo")
+                        try:
+                            # Hash do vídeo uma vez por job: cache de áudio, de resultado e checkpoint
+                            audio_key = self.audio_cache.key(job['file_path'])
+                            cache_key = ResultCache.key(audio_key, model_name, options)
+                            result = self.result_cache.get(cache_key)
+                            if result is not None:
+                                self.status_update.emit(f"⚡ Transcrição em cache {idx + 1}/{len(self.jobs)}: "
+                                                        f"{os.path.basename(job['file_path'])}")
+                            else:
+                                if transcribe is None:
+                                    # O modelo só carrega quando algum arquivo não está no cache
+                                    try:
+                                        transcribe = transcriber.enter_context(self._transcriber(model_name))
+                                    except Exception as e:
+                                        load_error = e
+                                        break
+                                result = transcribe(idx, job, audio_key, cache_key)
+                                if not self._is_running or result is None:
+                                    break
+                                self.result_cache.put(cache_key, result, audio_key, model_name, options,
+                                                      source=job['file_path'])
+                            self._generate_srt(result, job['srt_path'])
+                        except Exception as e:
+                            traceback.print_exc()
+                            with self._lock:
+                                self._errors += 1
+                            self.job_update.emit(idx, f"❌ Erro: {e}")
+                            self._step_done('transcription')
+                            if self.config['generate_video']:
+                                self._step_done('render')
+                            continue
+                        self._step_done('transcription')
+
+                        if self.config['generate_video']:
+                            self.job_update.emit(idx, "🎬 Na fila de render")
+                            renders.submit(self._render_job, idx, job)
+                        else:
+                            self.job_update.emit(idx, "✅ Pronto")
+
+                    if self.config['generate_video'] and self._is_running:
+                        self.status_update.emit("🎬 Finalizando renders com FFmpeg...")
+            finally:
+                renders.shutdown(wait=True)
+
+            if load_error is not None:
+                self.finished.emit(False, f"Erro ao carregar modelo.\n{str(load_error)}")
                 return
 
-            if not self._is_running: return
-
-            self.status_update.emit("🎙️ Transcrevendo áudio... (Aguarde)")
-            result = model.transcribe(self.config['file_path'], word_timestamps=True)
-            
-            if not self._is_running: return
-
-            self.status_update.emit("📝 Processando legendas...")
-            self.progress_update.emit(80)
-            
-            self._generate_srt(result, self.config['srt_path'])
-
-            if not self._is_running: return
+            if not self._is_running:
+                self.finished.emit(False, "Cancelado pelo usuário.")
+                return
 
-            if self.config['generate_video']:
-                self.status_update.emit("🎬 Renderizando vídeo com FFmpeg...")
-                self.progress_update.emit(90)
-                self._render_video()
-            
             self.progress_update.emit(100)
-            msg = f"Processo concluído!\nSRT salvo em: {os.path.basename(self.config['srt_path'])}"
-            self.finished.emit(True, msg)
+            if self._errors:
+                self.finished.emit(False, f"{len(self.jobs) - self._errors} de {len(self.jobs)} arquivos concluídos.\n"
+                                          f"{self._errors} com erro (veja a lista).")
+            else:
+                msg = f"Processo concluído!\n{len(self.jobs)} arquivo(s); legendas salvas ao lado de cada vídeo."
+                self.finished.emit(True, msg)
 
         except Exception as e:
             traceback.print_exc()
             self.finished.emit(False, f"Erro inesperado: {str(e)}")
 
-    def _generate_srt(self, result, path):
+    def _cues(self, segments):
+        """
+        [(início, fim, texto)] já formatados no estilo escolhido. Cada segmento
+        vira legendas por conta própria, então dá para gerar aos poucos.
+        """
         is_phrase_mode = self.config['subtitle_type'] == "Frases Inteligentes"
         
         if is_phrase_mode:
             # Usa a lógica avançada do SRTProcessor
             processor = SRTProcessor()
-            for i, segment in enumerate(result.get('segments', [])):
+            for i, segment in enumerate(segments):
                 start = timedelta(seconds=segment['start'])
                 end = timedelta(seconds=segment['end'])
                 text = segment['text'].strip()
                 processor.subtitles.append(SubtitleItem(i+1, start, end, text))
             
             processed_subs = processor.split_subtitles(max_chars=self.config['max_chars'])
-            processor.save_to_file(path, processed_subs)
+            return [(processor.format_time(sub.start), processor.format_time(sub.end), sub.text)
+                    for sub in processed_subs]
             
         else:
             # Lógica simples Palavra por Palavra (Mantendo word_timestamps exatos)
-            with open(path, "w", encoding='utf-8') as f:
-                counter = 1
-                for segment in result.get('segments', []):
-                    for w in segment.get('words', []):
-                        start, end = w['start'], w['end']
-                        if start >= end: end = start + 0.1
-                        f.write(f"{counter}\n{self._fmt_time_simple(start)} --> {self._fmt_time_simple(end)}\n{w['word'].strip()}\n\n")
-                        counter += 1
-
-    def _render_video(self):
-        sub_path = self.config['srt_path'].replace("\\", "/").replace(":", "\\:")
-        
-        cmd = [
-            "ffmpeg", "-y", "-i", self.config['file_path'],
-            "-vf", f"subtitles='{sub_path}'",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            "-c:a", "aac", "-b:a", "192k",
-            self.config['video_path']
-        ]
-
-        startupinfo = None
-        if sys.platform == "win32":
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+            cues = []
+            for segment in segments:
+                for w in segment.get('words', []):
+                    start, end = w['start'], w['end']
+                    if start >= end: end = start + 0.1
+                    cues.append((self._fmt_time_simple(start), self._fmt_time_simple(end), w['word'].strip()))
+            return cues
+
+    def _write_cues(self, f, cues, counter):
+        for start, end, text in cues:
+            f.write(f"{counter}\n{start} --> {end}\n{text}\n\n")
+            counter += 1
+        return counter
 
-        process = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-            text=True, encoding='utf-8', startupinfo=startupinfo
-        )
-
-        while self._is_running:
-            if process.poll() is not None: break
-            time.sleep(0.2)
-        
-        if not self._is_running:
-            process.terminate()
-            raise Exception("Cancelado pelo usuário.")
-        
-        if process.returncode != 0:
-            err = process.stderr.read()
-            raise Exception(f"Erro FFmpeg: {err}")
+    def _generate_srt(self, result, path):
+        with open(path, "w", encoding='utf-8') as f:
+            self._write_cues(f, self._cues(result.get('segments', [])), 1)
+
+    def _render_video(self, idx, job):
+        last = None
+
+        def on_progress(info):
+            nonlocal last
+            self._partial_progress('render', info['time'], info['duration'])
+            percent = int(min(1.0, info['time'] / info['duration']) * 100) if info['duration'] else 0
+            if percent != last:
+                last = percent
+                self.job_update.emit(idx, f"🎬 Renderizando {percent}% · {info['speed']:.1f}x")
+
+        segments = None if self.config.get('parallel_render') else 1
+        render = SegmentedRender(job['file_path'], job['srt_path'], job['video_path'], segments, on_progress)
+        with self._lock:
+            if not self._is_running:
+                raise FFmpegCancelled()
+            self._renders.add(render)
+        try:
+            render.run()
+        finally:
+            with self._lock:
+                self._renders.discard(render)
 
     def _fmt_time_simple(self, seconds):
         seconds = max(0, seconds)
@@ -317,10 +545,15 @@ class TranscriptionWorker(QThread):
     
     def stop(self):
         self._is_running = False
+        # O ffmpeg em andamento é encerrado na hora, sem esperar um polling
+        with self._lock:
+            renders = list(self._renders)
+        for render in renders:
+            render.cancel()
 
 # --- WIDGET DROP ZONE ---
 class DropZone(QFrame):
-    fileDropped = pyqtSignal(str)
+    filesDropped = pyqtSignal(list)
 
     def __init__(self):
         super().__init__()
@@ -335,7 +568,7 @@ class DropZone(QFrame):
         self.icon_label.setStyleSheet("font-size: 40px; background: transparent; border: none;")
         self.icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
-        self.text_label = QLabel("Arraste um vídeo aqui ou clique")
+        self.text_label = QLabel("Arraste vídeos aqui ou clique")
         self.text_label.setStyleSheet("color: #888888; font-weight: bold; background: transparent; border: none;")
         self.text_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
@@ -348,9 +581,9 @@ class DropZone(QFrame):
             self.open_file_dialog()
 
     def open_file_dialog(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Selecionar Vídeo", "", "Media (*.mp4 *.mov *.mkv *.mp3 *.wav)")
-        if path:
-            self.fileDropped.emit(path)
+        paths, _ = QFileDialog.getOpenFileNames(self, "Selecionar Vídeos", "", "Media (*.mp4 *.mov *.mkv *.mp3 *.wav)")
+        if paths:
+            self.filesDropped.emit(paths)
 
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
@@ -365,21 +598,30 @@ class DropZone(QFrame):
     def dropEvent(self, event: QDropEvent):
         self.setStyleSheet("") 
         files = [u.toLocalFile() for u in event.mimeData().urls()]
+        files = [f for f in files if os.path.isfile(f)]
         if files:
-            self.fileDropped.emit(files[0])
+            self.filesDropped.emit(files)
 
 # --- JANELA PRINCIPAL ---
 class ModernSubtitleApp(QMainWindow):
+    model_ready = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
+        self.model_pool = ModelPool()
+        self.audio_cache = AudioCache()
+        self.result_cache = ResultCache()
+        self.model_ready.connect(self.on_model_ready)
         self.worker = None
-        self.selected_file = None
-        self.srt_path = None
-        self.video_path = None
+        # Fila: [{'file_path', 'srt_path', 'video_path', 'status'}]
+        self.jobs = []
+        # Índices em self.jobs dos arquivos entregues ao worker atual
+        self.running_jobs = []
         
         self.setWindowTitle("Whisper Auto-Caption AI")
         self.resize(550, 780)
         self.setup_ui()
+        self.preload_model()
 
     def setup_ui(self):
         central_widget = QWidget()
@@ -401,16 +643,21 @@ class ModernSubtitleApp(QMainWindow):
         card_layout = QVBoxLayout(self.file_card)
         
         self.drop_zone = DropZone()
-        self.drop_zone.fileDropped.connect(self.on_file_selected)
+        self.drop_zone.filesDropped.connect(self.on_files_selected)
         
-        self.file_label = QLabel("Nenhum arquivo selecionado")
-        self.file_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.file_label.setStyleSheet("color: #0078D4; font-weight: bold; margin-top: 5px;")
-        self.file_label.setVisible(False)
+        self.queue_list = QListWidget()
+        self.queue_list.setMinimumHeight(110)
+        self.queue_list.setVisible(False)
+
+        self.btn_clear = QPushButton("Limpar fila")
+        self.btn_clear.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_clear.clicked.connect(self.clear_queue)
+        self.btn_clear.setVisible(False)
 
-        card_layout.addWidget(QLabel("1. Arquivo de Entrada"))
+        card_layout.addWidget(QLabel("1. Arquivos de Entrada"))
         card_layout.addWidget(self.drop_zone)
-        card_layout.addWidget(self.file_label)
+        card_layout.addWidget(self.queue_list)
+        card_layout.addWidget(self.btn_clear)
         main_layout.addWidget(self.file_card)
 
         settings_card = QFrame()
@@ -425,12 +672,24 @@ class ModernSubtitleApp(QMainWindow):
         self.model_combo = QComboBox()
         self.model_combo.addItems(["tiny", "base", "small", "medium", "large-v3"])
         self.model_combo.setCurrentText("small")
+        self.model_combo.currentTextChanged.connect(self.preload_model)
         col1.addWidget(self.model_combo)
+
+        self.preload_check = QCheckBox("Pré-carregar modelo")
+        self.preload_check.setToolTip("Carrega o modelo em segundo plano assim que ele é escolhido")
+        self.preload_check.toggled.connect(lambda checked: checked and self.preload_model())
+        col1.addWidget(self.preload_check)
         
         col1.addWidget(QLabel("Modo de Saída:"))
         self.mode_combo = QComboBox()
         self.mode_combo.addItems(["Apenas SRT", "SRT + Vídeo"])
         col1.addWidget(self.mode_combo)
+
+        self.parallel_render_check = QCheckBox("Render paralelo")
+        self.parallel_render_check.setToolTip("Divide o vídeo em keyframes e queima as legendas de cada parte "
+                                              "num FFmpeg próprio. Bem mais rápido em máquinas com muitos núcleos; "
+                                              "o arquivo final não é idêntico ao do render em uma passada.")
+        col1.addWidget(self.parallel_render_check)
         
         col2 = QVBoxLayout()
         col2.addWidget(QLabel("Estilo da Legenda:"))
@@ -448,6 +707,18 @@ class ModernSubtitleApp(QMainWindow):
         self.char_spin.setCursor(Qt.CursorShape.PointingHandCursor)
         col2.addWidget(self.char_spin)
 
+        self.parallel_check = QCheckBox("Transcrição paralela")
+        self.parallel_check.setToolTip("Divide o áudio nos silêncios e transcreve os trechos em vários "
+                                       "processos. Vale para gravações longas em máquinas com muitos núcleos.")
+        col2.addWidget(self.parallel_check)
+
+        self.streaming_check = QCheckBox("Gravar SRT durante a transcrição")
+        self.streaming_check.setToolTip("Transcreve em janelas e grava as legendas prontas no SRT. "
+                                        "Se parar no meio, rodar de novo continua de onde parou. "
+                                        "Os cortes e o texto podem sair um pouco diferentes da "
+                                        "transcrição inteira de uma vez.")
+        col2.addWidget(self.streaming_check)
+
         grid.addLayout(col1)
         grid.addSpacing(20)
         grid.addLayout(col2)
@@ -476,6 +747,23 @@ class ModernSubtitleApp(QMainWindow):
 
         self.toggle_char_spin()
 
+    def preload_model(self, *_):
+        if not self.preload_check.isChecked():
+            return
+        name = self.model_combo.currentText()
+        # O callback roda na thread do load; o sinal leva o resultado para a interface
+        started = self.model_pool.preload(name, lambda n, e: self.model_ready.emit(n, str(e) if e else ""))
+        if started and not (self.worker and self.worker.isRunning()):
+            self.status_label.setText(f"⏳ Pré-carregando modelo '{name}'...")
+
+    def on_model_ready(self, name, error):
+        if self.worker and self.worker.isRunning():
+            return
+        if error:
+            self.status_label.setText(f"Erro ao carregar modelo '{name}'")
+        elif name == self.model_combo.currentText():
+            self.status_label.setText(f"✅ Modelo '{name}' em memória")
+
     def toggle_char_spin(self):
         is_smart_mode = self.style_combo.currentText() == "Frases Inteligentes"
         self.char_spin.setEnabled(is_smart_mode)
@@ -484,25 +772,56 @@ class ModernSubtitleApp(QMainWindow):
         else:
             self.limit_label.setStyleSheet("color: #555555;")
 
-    def on_file_selected(self, path):
-        self.selected_file = path
-        name = os.path.basename(path)
-        self.drop_zone.text_label.setText(name)
+    def on_files_selected(self, paths):
+        known = {job['file_path'] for job in self.jobs}
+        for path in paths:
+            if path in known:
+                continue
+            known.add(path)
+            srt_path, video_path = output_paths(path)
+            self.jobs.append({'file_path': path, 'srt_path': srt_path, 'video_path': video_path,
+                              'status': "⏳ Na fila"})
+            item = QListWidgetItem()
+            item.setToolTip(path)
+            self.queue_list.addItem(item)
+            self.update_job_item(len(self.jobs) - 1)
+
+        count = len(self.jobs)
+        self.drop_zone.text_label.setText(f"{count} arquivo(s) na fila — arraste mais ou clique")
         self.drop_zone.icon_label.setText("🎞️")
-        self.file_label.setText(path)
-        self.file_label.setVisible(True)
-        
-        folder = os.path.dirname(path)
-        base_name = os.path.splitext(name)[0]
-        self.srt_path = os.path.join(folder, f"{base_name}.srt")
-        self.video_path = os.path.join(folder, f"{base_name}_legendado.mp4")
-        
+        self.queue_list.setVisible(count > 0)
+        self.btn_clear.setVisible(count > 0)
         self.check_ready()
 
+    def update_job_item(self, idx):
+        job = self.jobs[idx]
+        self.queue_list.item(idx).setText(f"{job['status']}  —  {os.path.basename(job['file_path'])}")
+
+    def on_job_update(self, worker_idx, status):
+        # O worker numera só os jobs que recebeu
+        idx = self.running_jobs[worker_idx]
+        self.jobs[idx]['status'] = status
+        self.update_job_item(idx)
+
+    def pending_jobs(self):
+        return [i for i, job in enumerate(self.jobs) if not job['status'].startswith("✅")]
+
+    def clear_queue(self):
+        if self.worker and self.worker.isRunning():
+            return
+        self.jobs = []
+        self.queue_list.clear()
+        self.queue_list.setVisible(False)
+        self.btn_clear.setVisible(False)
+        self.drop_zone.text_label.setText("Arraste vídeos aqui ou clique")
+        self.drop_zone.icon_label.setText("📂")
+        self.btn_action.setEnabled(False)
+        self.status_label.setText("Aguardando...")
+
     def check_ready(self):
-        if self.selected_file:
+        if self.pending_jobs():
             self.btn_action.setEnabled(True)
-            self.status_label.setText("Pronto para iniciar")
+            self.status_label.setText(f"Pronto para iniciar ({len(self.pending_jobs())} arquivo(s))")
 
     def start_processing(self):
         if self.worker and self.worker.isRunning():
@@ -511,14 +830,22 @@ class ModernSubtitleApp(QMainWindow):
             self.btn_action.setEnabled(False)
             return
 
+        # Fila toda pronta: roda de novo (outro estilo de legenda sai do cache, sem o modelo)
+        self.running_jobs = self.pending_jobs() or list(range(len(self.jobs)))
+        if not self.running_jobs:
+            return
+        for idx in self.running_jobs:
+            self.jobs[idx]['status'] = "⏳ Na fila"
+            self.update_job_item(idx)
+
         config = {
-            'file_path': self.selected_file,
-            'srt_path': self.srt_path,
-            'video_path': self.video_path,
             'model': self.model_combo.currentText(),
             'subtitle_type': self.style_combo.currentText(),
             'max_chars': self.char_spin.value(),
-            'generate_video': self.mode_combo.currentText() == "SRT + Vídeo"
+            'generate_video': self.mode_combo.currentText() == "SRT + Vídeo",
+            'parallel': self.parallel_check.isChecked(),
+            'streaming': self.streaming_check.isChecked(),
+            'parallel_render': self.parallel_render_check.isChecked()
         }
 
         self.btn_action.setText("CANCELAR")
@@ -526,16 +853,25 @@ class ModernSubtitleApp(QMainWindow):
         self.btn_action.style().unpolish(self.btn_action)
         self.btn_action.style().polish(self.btn_action)
         
-        self.worker = TranscriptionWorker(config)
+        jobs = [{key: self.jobs[idx][key] for key in ('file_path', 'srt_path', 'video_path')}
+                for idx in self.running_jobs]
+        self.worker = TranscriptionWorker(config, jobs, self.model_pool, self.audio_cache, self.result_cache)
         self.worker.status_update.connect(self.status_label.setText)
         self.worker.progress_update.connect(self.pbar.setValue)
+        self.worker.job_update.connect(self.on_job_update)
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
 
     def on_finished(self, success, message):
+        # Arquivos que não chegaram ao fim (cancelamento ou erro ao carregar o modelo)
+        for idx in self.running_jobs:
+            if not self.jobs[idx]['status'].startswith(("✅", "❌")):
+                self.jobs[idx]['status'] = "⛔ Cancelado" if "Cancelado" in message else "⏳ Na fila"
+                self.update_job_item(idx)
+
         self.btn_action.setText("INICIAR PROCESSO")
         self.btn_action.setObjectName("PrimaryButton")
-        self.btn_action.setEnabled(True)
+        self.btn_action.setEnabled(bool(self.jobs))
         self.btn_action.style().unpolish(self.btn_action)
         self.btn_action.style().polish(self.btn_action)
 
@@ -550,6 +886,8 @@ class ModernSubtitleApp(QMainWindow):
                 QMessageBox.critical(self, "Erro", message)
 
 if __name__ == "__main__":
+    # Processos da transcrição paralela no executável empacotado
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setStyleSheet(MODERN_STYLESHEET)
     window = ModernSubtitleApp()
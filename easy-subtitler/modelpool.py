@@ -0,0 +1,159 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import whisper
+
+# Memória aproximada de cada modelo carregado (pesos fp32), usada antes do
+# load para abrir espaço; depois do load vale o tamanho medido
+MODEL_SIZES_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3100,
+    "large-v3": 6200,
+}
+
+# Orçamento de RAM para modelos em memória; EASY_SUBTITLER_MODEL_RAM_MB sobrepõe
+DEFAULT_BUDGET_MB = int(os.environ.get("EASY_SUBTITLER_MODEL_RAM_MB", 8192))
+
+
+def model_size_bytes(model):
+    return sum(p.numel() * p.element_size() for p in model.parameters())
+
+
+class ModelPool:
+    """
+    Mantém os modelos Whisper carregados entre um job e outro. Quando a soma
+    passa do orçamento, descarta o usado há mais tempo (LRU), nunca um que
+    esteja em uso. Vários pedidos do mesmo modelo ao mesmo tempo esperam um
+    único load, e os loads em andamento já contam no orçamento.
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, loader=None):
+        self.budget = budget_mb * 1024 * 1024
+        self.loader = loader or whisper.load_model
+        self._models = OrderedDict()   # nome -> (modelo, bytes), do menos ao mais recente
+        self._loading = set()
+        self._pins = {}
+        self._cond = threading.Condition()
+        # Pré-carga: uma thread só, com no máximo um pedido esperando
+        self._preload_next = None
+        self._preload_thread = None
+
+    def _used(self):
+        # Os que ainda estão carregando entram pelo tamanho estimado
+        loading = sum(MODEL_SIZES_MB.get(name, 0) * 1024 * 1024 for name in self._loading)
+        return sum(size for _, size in self._models.values()) + loading
+
+    def _evict(self, needed, keep):
+        evicted = False
+        for name in list(self._models):
+            if self._used() + needed <= self.budget:
+                break
+            if name == keep or self._pins.get(name):
+                continue
+            del self._models[name]
+            evicted = True
+        if evicted:
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+
+    def is_loaded(self, name):
+        with self._cond:
+            return name in self._models
+
+    def loaded(self):
+        """
+        [(nome, MB)] do menos ao mais recente.
+        """
+        with self._cond:
+            return [(name, size // (1024 * 1024)) for name, (_, size) in self._models.items()]
+
+    def get(self, name):
+        with self._cond:
+            while name in self._loading:
+                self._cond.wait()
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name][0]
+            # Abre espaço antes: dois modelos grandes juntos podem não caber na RAM
+            self._evict(MODEL_SIZES_MB.get(name, 0) * 1024 * 1024, keep=None)
+            self._loading.add(name)
+
+        try:
+            model = self.loader(name)
+        except BaseException:
+            with self._cond:
+                self._loading.discard(name)
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._models[name] = (model, model_size_bytes(model))
+            self._loading.discard(name)
+            self._evict(0, keep=name)
+            self._cond.notify_all()
+        return model
+
+    @contextmanager
+    def use(self, name):
+        """
+        with pool.use("small") as model: ... — o modelo não é descartado enquanto em uso.
+        """
+        with self._cond:
+            self._pins[name] = self._pins.get(name, 0) + 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._cond:
+                self._pins[name] -= 1
+                self._evict(0, keep=None)
+
+    def _run_preloads(self):
+        while True:
+            with self._cond:
+                if self._preload_next is None:
+                    self._preload_thread = None
+                    return
+                name, on_done = self._preload_next
+                self._preload_next = None
+            try:
+                self.get(name)
+            except Exception as e:
+                if on_done is not None:
+                    on_done(name, e)
+                continue
+            if on_done is not None:
+                on_done(name, None)
+
+    def preload(self, name, on_done=None):
+        """
+        Carrega em segundo plano. on_done(nome, erro ou None) roda na thread do
+        load. Um load por vez: o load em andamento vai até o fim, mas um
+        pedido novo substitui o que ainda estava esperando (trocar de modelo
+        várias vezes seguidas carrega só o último). Retorna True se o pedido
+        foi aceito.
+        """
+        with self._cond:
+            if name in self._models or name in self._loading:
+                return False
+            self._preload_next = (name, on_done)
+            if self._preload_thread is None:
+                self._preload_thread = threading.Thread(target=self._run_preloads, name="preload", daemon=True)
+                self._preload_thread.start()
+        return True
+
+    def clear(self):
+        with self._cond:
+            for name in list(self._models):
+                if not self._pins.get(name):
+                    del self._models[name]
+        gc.collect()
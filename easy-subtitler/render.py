@@ -0,0 +1,313 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Abaixo disso o custo de abrir vários ffmpeg não compensa
+MIN_SEGMENT_SECONDS = 30
+# Quanto o ffprobe lê em volta de cada ponto de corte procurando keyframes
+KEYFRAME_PROBE_SECONDS = 10
+# Threads do libx264 por segmento: o gargalo é o filtro de legendas, que é serial
+THREADS_PER_SEGMENT = 2
+
+VIDEO_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "23"]
+AUDIO_ARGS = ["-c:a", "aac", "-b:a", "192k"]
+
+# Linhas finais do stderr guardadas para a mensagem de erro
+STDERR_TAIL_LINES = 30
+
+
+class FFmpegError(Exception):
+    pass
+
+
+class FFmpegCancelled(Exception):
+    def __init__(self):
+        super().__init__("Cancelado pelo usuário.")
+
+
+def startupinfo():
+    if sys.platform != "win32":
+        return None
+    info = subprocess.STARTUPINFO()
+    info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return info
+
+
+def subtitles_filter(srt_path):
+    sub_path = srt_path.replace("\\", "/").replace(":", "\\:")
+    return f"subtitles='{sub_path}'"
+
+
+def single_pass_cmd(source, srt_path, output):
+    return ["ffmpeg", "-y", "-i", source, "-vf", subtitles_filter(srt_path)] + VIDEO_ARGS + AUDIO_ARGS + [output]
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_progress_time(block):
+    """
+    Segundos já gerados num bloco do -progress (out_time_us; "N/A" no começo).
+    """
+    try:
+        return max(0.0, int(block.get("out_time_us", "")) / 1_000_000)
+    except ValueError:
+        return 0.0
+
+
+class FFmpegRunner:
+    """
+    Roda um ffmpeg lendo o -progress (chave=valor no stdout) numa thread e o
+    stderr noutra, guardando só o final. Com os dois pipes sempre drenados o
+    ffmpeg nunca trava com o buffer cheio. on_progress(bloco) recebe cada
+    bloco do -progress como dict; cancel() pode vir de qualquer thread.
+    """
+
+    def __init__(self, cmd, on_progress=None):
+        # -progress antes das saídas; -nostats tira a linha de status do stderr
+        self.cmd = cmd[:1] + ["-nostats", "-progress", "pipe:1"] + cmd[1:]
+        self.on_progress = on_progress
+        self.stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self._process = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def _read_progress(self, stream):
+        block = {}
+        for line in stream:
+            key, _, value = line.strip().partition("=")
+            block[key] = value
+            if key == "progress":
+                if self.on_progress is not None:
+                    self.on_progress(block)
+                block = {}
+
+    def _read_stderr(self, stream):
+        for line in stream:
+            self.stderr_tail.append(line.rstrip())
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            process = self._process
+        if process is not None and process.poll() is None:
+            # kill e não terminate: com SIGTERM o ffmpeg ainda esvazia o encoder
+            # (segundos num render longo) para uma saída que vai ser descartada
+            process.kill()
+
+    def run(self):
+        with self._lock:
+            if self._cancelled:
+                raise FFmpegCancelled()
+            self._process = subprocess.Popen(
+                self.cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace', startupinfo=startupinfo()
+            )
+        readers = [threading.Thread(target=self._read_progress, args=(self._process.stdout,), daemon=True),
+                   threading.Thread(target=self._read_stderr, args=(self._process.stderr,), daemon=True)]
+        for reader in readers:
+            reader.start()
+        returncode = self._process.wait()
+        for reader in readers:
+            reader.join()
+
+        if self._cancelled:
+            raise FFmpegCancelled()
+        if returncode != 0:
+            raise FFmpegError("Erro FFmpeg:\n" + "\n".join(self.stderr_tail))
+
+
+def _ffprobe(args):
+    out = subprocess.run(["ffprobe", "-v", "error", "-of", "json"] + args, capture_output=True,
+                         check=True, startupinfo=startupinfo()).stdout
+    return json.loads(out or b"{}")
+
+
+def probe_timing(path):
+    """
+    (duração, start_time) em segundos. O -ss de entrada do ffmpeg conta a
+    partir do start_time, os pts do ffprobe não.
+    """
+    fmt = _ffprobe(["-show_entries", "format=duration,start_time", path]).get("format", {})
+    return float(fmt.get("duration") or 0), float(fmt.get("start_time") or 0)
+
+
+def keyframes_near(path, targets):
+    """
+    pts (segundos, absolutos) dos keyframes de vídeo perto de cada alvo. Lê só
+    alguns segundos em volta de cada um (-read_intervals), não o arquivo todo.
+    """
+    intervals = ",".join(f"{max(0.0, t - KEYFRAME_PROBE_SECONDS / 2):.3f}%+{KEYFRAME_PROBE_SECONDS}"
+                         for t in targets)
+    packets = _ffprobe(["-select_streams", "v:0", "-read_intervals", intervals,
+                        "-show_entries", "packet=pts_time,flags", path]).get("packets", [])
+    return sorted({float(p["pts_time"]) for p in packets
+                   if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A")})
+
+
+class SegmentedRender:
+    """
+    Render com legendas em paralelo: corta o vídeo em keyframes, queima as
+    legendas de cada segmento num ffmpeg próprio e junta os pedaços por cópia
+    de stream. O áudio é codificado uma vez só, na junção, direto da origem.
+
+    O deslocamento de cada segmento vai nos timestamps dos quadros (setpts),
+    não nos tempos do SRT: o libass trunca o tempo do quadro em ms, e com o
+    SRT deslocado uma legenda que termina colada num quadro ficava um quadro
+    a mais. Assim o filtro vê os mesmos pts do render em uma passada só.
+    """
+
+    def __init__(self, source, srt_path, output, segments=None, on_progress=None):
+        self.source = source
+        self.srt_path = srt_path
+        self.output = output
+        self.segments = segments or max(1, (os.cpu_count() or 1) // THREADS_PER_SEGMENT)
+        self.on_progress = on_progress
+        self.duration = None
+        self._runners = set()
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def plan(self):
+        """
+        Limites dos segmentos em segundos desde o início do vídeo, sempre em
+        keyframes: [0, k1, ..., None]. Uma lista de um só segmento quer dizer
+        que não vale dividir.
+        """
+        try:
+            duration, start_time = probe_timing(self.source)
+            self.duration = duration
+            count = min(self.segments, int(duration // MIN_SEGMENT_SECONDS))
+            if count < 2:
+                return [0.0, None]
+
+            targets = [duration * i / count for i in range(1, count)]
+            keyframes = [k - start_time for k in keyframes_near(self.source, [t + start_time for t in targets])]
+        except (subprocess.CalledProcessError, OSError, ValueError):
+            # Sem ffprobe ou container que ele não entende: render em uma passada
+            return [0.0, None]
+        cuts = set()
+        for target in targets:
+            nearest = min(keyframes, key=lambda k: abs(k - target), default=None)
+            if nearest is not None and MIN_SEGMENT_SECONDS / 2 < nearest < duration - MIN_SEGMENT_SECONDS / 2:
+                cuts.add(round(nearest, 6))
+        return [0.0] + sorted(cuts) + [None]
+
+    def commands(self, bounds, workdir):
+        """
+        ([comando de cada segmento], comando da junção).
+        """
+        threads = max(1, (os.cpu_count() or 1) // (len(bounds) - 1))
+
+        segment_cmds, parts = [], []
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            part = os.path.join(workdir, f"{i:03}.mp4")
+            parts.append(part)
+            cmd = ["ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", self.source]
+            if end is not None:
+                cmd += ["-t", f"{end - start:.6f}"]
+            vf = f"setpts=PTS+{start:.6f}/TB,{subtitles_filter(self.srt_path)},setpts=PTS-STARTPTS"
+            cmd += ["-map", "0:v:0", "-vf", vf] + VIDEO_ARGS + ["-threads", str(threads), "-an", part]
+            segment_cmds.append(cmd)
+
+        concat_list = os.path.join(workdir, "concat.txt")
+        with open(concat_list, 'w', encoding='utf-8') as f:
+            for part in parts:
+                escaped = part.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        concat_cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", concat_list, "-i", self.source,
+                      "-map", "0:v", "-map", "1:a:0?", "-map_metadata", "1", "-c:v", "copy"] + AUDIO_ARGS + [self.output]
+        return segment_cmds, concat_cmd
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            runners = list(self._runners)
+        for runner in runners:
+            runner.cancel()
+
+    def _run(self, cmd, on_progress=None):
+        runner = FFmpegRunner(cmd, on_progress)
+        with self._lock:
+            if self._cancelled:
+                raise FFmpegCancelled()
+            self._runners.add(runner)
+        try:
+            runner.run()
+        finally:
+            with self._lock:
+                self._runners.discard(runner)
+
+    def run(self):
+        """
+        Roda até o fim; levanta FFmpegError ou FFmpegCancelled. on_progress
+        recebe {'time', 'frame', 'speed', 'duration'}, somados de todos os segmentos.
+        Retorna quantos segmentos foram usados.
+        """
+        if self.segments < 2:
+            # Sem divisão não precisa de keyframes; a duração só serve ao progresso
+            bounds = [0.0, None]
+            try:
+                self.duration = probe_timing(self.source)[0] or None
+            except (subprocess.CalledProcessError, OSError, ValueError):
+                pass
+        else:
+            bounds = self.plan()
+        if len(bounds) <= 2:
+            self._run(single_pass_cmd(self.source, self.srt_path, self.output), self._single_progress)
+            return 1
+
+        # Temporários no disco da saída: os segmentos somam o tamanho do vídeo final
+        workdir = tempfile.mkdtemp(prefix=".easy-subtitler-", dir=os.path.dirname(os.path.abspath(self.output)))
+        try:
+            segment_cmds, concat_cmd = self.commands(bounds, workdir)
+            times = [0.0] * len(segment_cmds)
+            frames = [0] * len(segment_cmds)
+            started = time.monotonic()
+            errors = []
+
+            def run_segment(i):
+                def on_progress(block):
+                    times[i] = parse_progress_time(block)
+                    frames[i] = _int(block.get("frame"))
+                    if self.on_progress is not None:
+                        done = sum(times)
+                        self.on_progress({'time': done, 'frame': sum(frames), 'duration': self.duration,
+                                          'speed': done / max(time.monotonic() - started, 1e-6)})
+                try:
+                    self._run(segment_cmds[i], on_progress)
+                except Exception as e:
+                    # Guarda só o primeiro erro real; os outros segmentos param por causa dele
+                    with self._lock:
+                        if not errors and not isinstance(e, FFmpegCancelled):
+                            errors.append(e)
+                    self.cancel()
+
+            with ThreadPoolExecutor(max_workers=len(segment_cmds)) as pool:
+                list(pool.map(run_segment, range(len(segment_cmds))))
+            if errors:
+                raise errors[0]
+            if self._cancelled:
+                raise FFmpegCancelled()
+            self._run(concat_cmd)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return len(segment_cmds)
+
+    def _single_progress(self, block):
+        if self.on_progress is not None:
+            speed = block.get("speed", "").rstrip("x")
+            self.on_progress({'time': parse_progress_time(block), 'frame': _int(block.get("frame")),
+                              'speed': float(speed) if speed not in ("", "N/A") else 0.0,
+                              'duration': self.duration})
@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+# Tamanho máximo do cache; EASY_SUBTITLER_RESULT_CACHE_MB sobrepõe
+DEFAULT_MAX_MB = int(os.environ.get("EASY_SUBTITLER_RESULT_CACHE_MB", 256))
+
+WORD_FIELDS = ('word', 'start', 'end', 'probability')
+
+
+def default_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "easy-subtitler", "results.sqlite")
+
+
+def compact(result):
+    """
+    Só o que as legendas usam: texto, idioma e segmentos com palavras, tempos
+    arredondados ao milissegundo. Tokens e probabilidades do decoder ficam de fora.
+    """
+    def ms(value):
+        return round(float(value), 3)
+
+    segments = []
+    for segment in result.get('segments', []):
+        item = {'start': ms(segment['start']), 'end': ms(segment['end']), 'text': segment['text']}
+        if 'words' in segment:
+            item['words'] = [{key: ms(w[key]) if key != 'word' else w[key] for key in WORD_FIELDS if key in w}
+                             for w in segment['words']]
+        segments.append(item)
+    return {'text': result.get('text', ''), 'language': result.get('language'), 'segments': segments}
+
+
+class ResultCache:
+    """
+    Resultados crus do Whisper (segmentos e palavras), por áudio, modelo e
+    opções de transcrição. Estilo da legenda e máx. de caracteres não entram
+    na chave: trocar só isso refaz o SRT a partir do cache, sem o modelo.
+    É um SQLite comum (tabela results), e `python resultcache.py` lista o conteúdo.
+    """
+
+    def __init__(self, path=None, max_mb=DEFAULT_MAX_MB):
+        self.path = os.path.abspath(path or default_cache_path())
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Criado na interface e usado pela thread do worker
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                source TEXT,
+                audio_key TEXT NOT NULL,
+                model TEXT NOT NULL,
+                options TEXT NOT NULL,
+                language TEXT,
+                segments INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used_at)")
+
+    @staticmethod
+    def key(audio_key, model, options):
+        options = json.dumps(options, sort_keys=True)
+        return hashlib.blake2b(f"{audio_key}/{model}/{options}".encode(), digest_size=20).hexdigest()
+
+    def get(self, key):
+        row = self.conn.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return json.loads(zlib.decompress(row["data"]))
+
+    def put(self, key, result, audio_key, model, options, source=None):
+        result = compact(result)
+        data = zlib.compress(json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+        segments = result['segments']
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, source, audio_key, model, json.dumps(options, sort_keys=True), result['language'],
+             len(segments), segments[-1]['end'] if segments else 0.0, len(data), now, now, data),
+        )
+        self.evict(keep=key)
+        self.conn.commit()
+
+    def entries(self):
+        """
+        Metadados de cada resultado, do usado há mais tempo ao mais recente.
+        """
+        return self.conn.execute(
+            "SELECT key, source, model, options, language, segments, duration, bytes, created_at, used_at "
+            "FROM results ORDER BY used_at"
+        ).fetchall()
+
+    def usage(self):
+        return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+
+    def evict(self, keep=None):
+        used = self.usage()
+        if used <= self.max_bytes:
+            return
+        for row in self.conn.execute("SELECT key, bytes FROM results ORDER BY used_at").fetchall():
+            if used <= self.max_bytes:
+                break
+            if row["key"] == keep:
+                continue
+            self.conn.execute("DELETE FROM results WHERE key = ?", (row["key"],))
+            used -= row["bytes"]
+
+    def clear(self):
+        self.conn.execute("DELETE FROM results")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista ou limpa o cache de transcrições.")
+    parser.add_argument("--cache", help="arquivo do cache (padrão: ~/.cache/easy-subtitler/results.sqlite)")
+    parser.add_argument("--clear", action="store_true", help="apaga todos os resultados")
+    args = parser.parse_args()
+
+    with ResultCache(args.cache) as cache:
+        if args.clear:
+            cache.clear()
+            return
+        for row in cache.entries():
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["used_at"]))
+            print(f"{row['key'][:12]}  {row['model']:<9} {row['language'] or '?':<3} "
+                  f"{row['duration'] / 60:6.1f} min  {row['segments']:5} seg  {row['bytes'] / 1024:7.1f} KB  "
+                  f"{used}  {row['source'] or ''}")
+        print(f"{len(cache.entries())} resultado(s), {cache.usage() / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
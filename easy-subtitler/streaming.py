@@ -0,0 +1,156 @@
+import json
+import os
+import time
+
+from whisper.audio import SAMPLE_RATE
+
+from chunked import find_chunks
+from resultcache import compact
+
+# Janelas menores que os trechos do modo paralelo: cada uma vira legendas
+# gravadas, um passo de progresso e um checkpoint
+WINDOW_SECONDS = 60
+MIN_WINDOW_SECONDS = 20
+MAX_WINDOW_SECONDS = 120
+
+# Contexto do decoder levado de uma janela para a outra (o Whisper usa no
+# máximo 223 tokens do prompt; 1000 caracteres cobrem isso com folga)
+PROMPT_CHARS = 1000
+
+# No modo padrão, arquivos até esse tamanho rodam numa chamada só (sem
+# checkpoint); os mais longos vão em janelas para poder retomar
+CHECKPOINT_MIN_SECONDS = 600
+
+PROGRESS_SUFFIX = ".progress"
+CHECKPOINT_VERSION = 2
+
+
+def offset_segments(segments, offset):
+    """
+    Segmentos de uma janela com os tempos no áudio inteiro, já compactos.
+    """
+    shifted = []
+    for segment in segments:
+        segment = dict(segment, start=segment['start'] + offset, end=segment['end'] + offset)
+        if 'words' in segment:
+            segment['words'] = [dict(w, start=w['start'] + offset, end=w['end'] + offset)
+                                for w in segment['words']]
+        shifted.append(segment)
+    return compact({'segments': shifted})['segments']
+
+
+class PartialTranscript:
+    """
+    Checkpoint da transcrição em andamento, ao lado do SRT (nome.srt.progress):
+    uma linha de cabeçalho com a chave do resultado (áudio, modelo e opções)
+    e uma linha JSON por janela concluída, com o intervalo em amostras, os
+    segmentos e o contexto do decoder para a janela seguinte. Cada linha vai
+    para o disco (fsync) antes de a próxima janela começar; crash, cancelamento
+    ou suspensão perdem no máximo a janela em andamento.
+    """
+
+    def __init__(self, srt_path):
+        self.path = srt_path + PROGRESS_SUFFIX
+        self.windows = {}   # (início, fim) em amostras -> segmentos
+        self.language = None
+        self.prompt = None
+
+    def load(self, key):
+        """
+        Carrega o checkpoint desta chave. False se não existe ou é de outro
+        áudio, modelo ou opções. Uma última linha cortada no meio é ignorada.
+        """
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return False
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return False
+        if header.get("version") != CHECKPOINT_VERSION or header.get("key") != key:
+            return False
+
+        for line in lines[1:]:
+            try:
+                window = json.loads(line)
+            except ValueError:
+                break
+            self.windows[(window["start"], window["end"])] = window["segments"]
+            self.language = self.language or window.get("language")
+            self.prompt = window.get("prompt")
+        return True
+
+    def start(self, key, duration):
+        self.windows, self.language, self.prompt = {}, None, None
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"version": CHECKPOINT_VERSION, "key": key, "duration": duration,
+                                "started_at": time.time()}) + "\n")
+
+    def add(self, start, end, result, prompt=None):
+        """
+        Grava uma janela concluída (resultado cru do Whisper para audio[start:end]).
+        Retorna os segmentos com os tempos no áudio inteiro.
+        """
+        segments = offset_segments(result.get('segments', []), start / SAMPLE_RATE)
+        language = self.language or result.get('language')
+        line = json.dumps({"start": start, "end": end, "language": language, "prompt": prompt,
+                           "segments": segments}, ensure_ascii=False, separators=(',', ':'))
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.windows[(start, end)] = segments
+        self.language, self.prompt = language, prompt
+        return segments
+
+    def done_seconds(self):
+        return sum(end - start for start, end in self.windows) / SAMPLE_RATE
+
+    def segments(self):
+        return [segment for window in sorted(self.windows) for segment in self.windows[window]]
+
+    def result(self):
+        segments = self.segments()
+        return {'text': ''.join(s['text'] for s in segments), 'segments': segments, 'language': self.language}
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class StreamingTranscriber:
+    """
+    Transcreve janela por janela (cortes nos silêncios) e entrega o resultado
+    de cada uma assim que fica pronto, para o SRT crescer durante a
+    transcrição e o progresso andar em segundos de áudio. O texto de cada
+    janela vira o prompt da seguinte, como o Whisper faz entre os blocos de 30 s.
+    """
+
+    def __init__(self, model, window_seconds=WINDOW_SECONDS):
+        self.model = model
+        self.window_seconds = window_seconds
+
+    def windows(self, audio):
+        return find_chunks(audio, self.window_seconds, MIN_WINDOW_SECONDS, MAX_WINDOW_SECONDS)
+
+    def transcribe(self, audio, on_window, done=(), language=None, prompt=None, should_stop=None, **options):
+        """
+        on_window(início, fim, resultado, prompt seguinte) por janela concluída,
+        em amostras. Pula as janelas em done. Retorna False se should_stop()
+        interrompeu, True no fim do áudio.
+        """
+        for start, end in self.windows(audio):
+            if (start, end) in done:
+                continue
+            if should_stop is not None and should_stop():
+                return False
+            result = self.model.transcribe(audio[start:end], language=language, initial_prompt=prompt, **options)
+            # O idioma da primeira janela vale para as seguintes
+            language = language or result.get('language')
+            prompt = ((prompt or '') + result.get('text', ''))[-PROMPT_CHARS:] or None
+            on_window(start, end, result, prompt)
+        return True
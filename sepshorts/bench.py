@@ -0,0 +1,194 @@
+"""
+Benchmark do organizador com pastas sintéticas (não importa Qt).
+
+    python bench.py --files 5000 --probe-latency 40
+    python bench.py --files 2000 --real-probe --repeat 3 --json
+
+Gera uma pasta com milhares de arquivos seguindo os padrões reais (360-*, .LRF,
+extensões de vídeo e foto em maiúsculas/minúsculas, AppleDouble ._*) e cabeçalhos
+MP4/MOV mínimos porém válidos. Mede separadamente as fases de scan, probe e move
+e imprime arquivos/s para que regressões apareçam.
+
+Por padrão usa um prober falso (dimensões conhecidas + latência configurável para
+simular o custo de abrir um ffprobe). --real-probe usa o prober do Organizer;
+nesse modo .mkv/.webm são só stubs e o ffprobe falha neles, então shorts
+fica abaixo de shorts_expected.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+from mover import JOURNAL_FILENAME, MoveEngine
+from organizer import DEFAULT_PROBE_WORKERS, Organizer, is_vertical, open_probe_cache
+
+# (peso, padrão de nome, tipo)
+PATTERNS = [
+    (10, "360-VID_{i:05d}.mp4", "video"),
+    (15, "DJI_{i:05d}.LRF", "lrf"),
+    (25, "DJI_{i:05d}.MP4", "video"),
+    (8, "IMG_{i:05d}.MOV", "video"),
+    (4, "clip_{i:05d}.mkv", "video"),
+    (3, "screen_{i:05d}.webm", "video"),
+    (18, "IMG_{i:05d}.JPG", "photo"),
+    (5, "IMG_{i:05d}.heic", "photo"),
+    (2, "DSC_{i:05d}.dng", "photo"),
+    (6, "._DJI_{i:05d}.MP4", "appledouble"),
+    (4, "notes_{i:05d}.txt", "other"),
+]
+
+IDENTITY = (0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+ROTATE_90 = (0, 0x10000, 0, -0x10000, 0, 0, 0, 0, 0x40000000)
+
+
+def _box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mp4_header(width, height, matrix=IDENTITY):
+    """
+    Menor MP4 que o mp4info (e o ffprobe) aceitam: ftyp + moov com uma trilha de vídeo.
+    """
+    tkhd = bytes(4) + bytes(20) + bytes(16) + struct.pack(">9i", *matrix) + struct.pack(">II", width << 16, height << 16)
+    entry = (struct.pack(">I4s", 86, b"avc1") + bytes(6) + struct.pack(">H", 1) + bytes(16)
+             + struct.pack(">HH", width, height) + bytes(50))
+    stsd = _box(b"stsd", bytes(4) + struct.pack(">I", 1) + entry)
+    hdlr = _box(b"hdlr", bytes(8) + b"vide" + bytes(12))
+    mdia = _box(b"mdia", hdlr + _box(b"minf", _box(b"stbl", stsd)))
+    moov = _box(b"moov", _box(b"mvhd", bytes(100)) + _box(b"trak", _box(b"tkhd", tkhd) + mdia))
+    return _box(b"ftyp", b"isom" + bytes(4)) + moov
+
+
+def generate_tree(folder, count, seed=0, payload_kb=0):
+    """
+    Cria `count` arquivos em `folder`. Retorna {nome: (largura, altura, rotação)}
+    com as dimensões verdadeiras de cada vídeo.
+    """
+    rng = random.Random(seed)
+    weights = [w for w, _, _ in PATTERNS]
+    payload = bytes(payload_kb * 1024)
+    truth = {}
+    os.makedirs(folder, exist_ok=True)
+
+    for i in range(count):
+        _, pattern, kind = rng.choices(PATTERNS, weights)[0]
+        name = pattern.format(i=i)
+        data = b"x"
+        if kind == "video":
+            portrait = rng.random() < 0.3
+            rotated = not portrait and rng.random() < 0.1
+            width, height = (1080, 1920) if portrait else (3840, 2160)
+            truth[name] = (width, height, 90 if rotated else 0)
+            if name.lower().endswith((".mp4", ".mov")):
+                data = mp4_header(width, height, ROTATE_90 if rotated else IDENTITY)
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+            f.write(payload)
+    return truth
+
+
+class FakeProber:
+    """
+    Prober de mentira: devolve as dimensões geradas e espera `latency`
+    segundos, simulando o custo de processo + seek de um ffprobe.
+    """
+
+    def __init__(self, truth, latency=0.0):
+        self.truth = truth
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.truth.get(os.path.basename(file_path))
+
+
+def run_once(root, args, seed):
+    folder = os.path.join(root, f"dump-{seed}")
+    truth = generate_tree(folder, args.files, seed, args.payload_kb)
+    prober = None if args.real_probe else FakeProber(truth, args.probe_latency / 1000)
+    organizer = Organizer(max_workers=args.probe_workers, prober=prober)
+
+    dirs = organizer.folder_dirs(folder)
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    cache = open_probe_cache(folder) if args.cache else None
+
+    t0 = time.perf_counter()
+    entries = organizer.scan_folder(folder, dirs)
+    t1 = time.perf_counter()
+    try:
+        plan, video_count = organizer.plan_entries(entries, dirs, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    t2 = time.perf_counter()
+    results = MoveEngine(os.path.join(folder, JOURNAL_FILENAME)).run([(m.src, m.dest) for m in plan])
+    t3 = time.perf_counter()
+
+    expected_shorts = sum(1 for name, dims in truth.items() if not name.startswith("360-") and is_vertical(dims))
+    shorts = sum(1 for m in plan if m.bucket == "Shorts")
+    return {
+        "files": args.files,
+        "videos": video_count,
+        "moves": len(plan),
+        "move_errors": sum(1 for r in results if r is not None),
+        "shorts": shorts,
+        "shorts_expected": expected_shorts,
+        "scan_s": round(t1 - t0, 4),
+        "probe_s": round(t2 - t1, 4),
+        "move_s": round(t3 - t2, 4),
+        "scan_files_per_s": round(len(entries) / max(t1 - t0, 1e-9)),
+        "probe_videos_per_s": round(video_count / max(t2 - t1, 1e-9)),
+        "move_files_per_s": round(len(plan) / max(t3 - t2, 1e-9)),
+        "total_files_per_s": round(args.files / max(t3 - t0, 1e-9)),
+    }
+
+
+def print_report(run, result):
+    print(f"run {run}: {result['files']} arquivos, {result['videos']} vídeos, "
+          f"{result['shorts']}/{result['shorts_expected']} shorts, {result['move_errors']} erros")
+    print(f"  scan : {result['scan_s']:8.3f}s  {result['scan_files_per_s']:>10} arquivos/s")
+    print(f"  probe: {result['probe_s']:8.3f}s  {result['probe_videos_per_s']:>10} vídeos/s")
+    print(f"  move : {result['move_s']:8.3f}s  {result['move_files_per_s']:>10} arquivos/s")
+    print(f"  total: {result['total_files_per_s']:>21} arquivos/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do organizador de mídia")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--probe-latency", type=float, default=30.0,
+                        help="latência simulada de cada probe em ms (padrão: %(default)s)")
+    parser.add_argument("--probe-workers", type=int, default=DEFAULT_PROBE_WORKERS)
+    parser.add_argument("--real-probe", action="store_true", help="usa o prober real (mp4info/ffprobe)")
+    parser.add_argument("--cache", action="store_true", help="usa o cache de probes em SQLite")
+    parser.add_argument("--payload-kb", type=int, default=0, help="bytes extras por arquivo")
+    parser.add_argument("--dir", default=None, help="onde criar as pastas (padrão: temporário)")
+    parser.add_argument("--json", action="store_true", help="uma linha JSON por execução")
+    args = parser.parse_args(argv)
+
+    root = args.dir or tempfile.mkdtemp(prefix="sepshorts-bench-")
+    try:
+        for run in range(args.repeat):
+            result = run_once(root, args, args.seed + run)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print_report(run, result)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
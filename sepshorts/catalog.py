@@ -0,0 +1,274 @@
+import math
+import os
+import sqlite3
+import time
+
+import ffmpeg
+
+from mp4info import MP4_EXTS, parse_iso6709, read_movie_info, read_video_dimensions
+from organizer import is_vertical
+from timecorrect import read_photo_info, reference_time
+
+# Pastas criadas pelo organizador -> bucket (Videos/Shorts vem antes de Videos)
+BUCKET_DIRS = (
+    (os.path.join("Videos", "Shorts"), "Shorts"),
+    ("360", "360"),
+    ("LRF", "LRF"),
+    ("Videos", "Videos"),
+    ("Fotos", "Fotos"),
+)
+
+COLUMNS = ("path", "folder", "name", "bucket", "size", "mtime_ns", "duration", "width", "height",
+           "rotation", "resolution", "vertical", "codec", "captured_at", "latitude", "longitude",
+           "cataloged_at")
+
+# Formato da sample entry (cabeçalho MP4) -> nome do codec no ffprobe
+CODEC_NAMES = {
+    "avc1": "h264", "avc3": "h264", "hvc1": "hevc", "hev1": "hevc", "av01": "av1",
+    "vp09": "vp9", "mp4v": "mpeg4", "apch": "prores", "apcn": "prores", "apcs": "prores",
+    "apco": "prores", "ap4h": "prores",
+}
+
+# O proxy .LRF da DJI é um MP4 com outra extensão
+HEADER_EXTS = MP4_EXTS + ('.lrf',)
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def default_catalog_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "sepshorts", "catalog.sqlite")
+
+
+def bucket_for_path(path):
+    """
+    Bucket de um arquivo já organizado, pela pasta em que ele está.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    for suffix, bucket in BUCKET_DIRS:
+        if parent.endswith(os.sep + suffix):
+            return bucket
+    return None
+
+
+def _probe_info(path):
+    """
+    Mesmos campos do read_movie_info via ffprobe, para o que não é MP4/MOV.
+    """
+    try:
+        probe = ffmpeg.probe(path)
+    except (ffmpeg.Error, Exception):
+        return None
+    fmt = probe.get('format', {})
+    tags = fmt.get('tags', {})
+    stream = next((s for s in probe.get('streams', []) if s.get('codec_type') == 'video'), {})
+    duration = fmt.get('duration') or stream.get('duration')
+    location = tags.get('location') or tags.get('com.apple.quicktime.location.ISO6709')
+    return {
+        "duration": float(duration) if duration else None,
+        "codec": stream.get('codec_name'),
+        "creation_time": None,
+        "location": parse_iso6709(location) if location else None,
+        "size": (stream.get('width'), stream.get('height')),
+    }
+
+
+def describe(path, bucket, dims=None, prober=None):
+    """
+    Monta a linha do catálogo de um arquivo. `dims` são as dimensões que o
+    organizador já obteve no planejamento (evita um segundo probe).
+    """
+    st = os.stat(path)
+    row = dict.fromkeys(COLUMNS)
+    row.update(path=path, folder=os.path.dirname(path), name=os.path.basename(path), bucket=bucket,
+               size=st.st_size, mtime_ns=st.st_mtime_ns, cataloged_at=time.time())
+
+    if bucket == "Fotos":
+        info = read_photo_info(path) or {}
+        if info.get("width") and info.get("height"):
+            dims = (info["width"], info["height"], 0)
+        location = info.get("location")
+    else:
+        info = None
+        if path.lower().endswith(HEADER_EXTS):
+            info = read_movie_info(path)
+            if info is not None and dims is None:
+                dims = read_video_dimensions(path)
+        if info is None:
+            info = _probe_info(path) or {}
+            width, height = info.get("size") or (None, None)
+            if dims is None and width and height:
+                dims = (int(width), int(height), 0)
+        if dims is None and prober is not None:
+            dims = prober(path)
+        row["duration"] = info.get("duration")
+        codec = info.get("codec")
+        row["codec"] = CODEC_NAMES.get(codec, codec)
+        location = info.get("location")
+
+    if dims and dims[0] and dims[1]:
+        width, height, rotation = dims
+        row.update(width=width, height=height, rotation=int(rotation),
+                   resolution=min(width, height), vertical=int(is_vertical(dims)))
+    if location:
+        row["latitude"], row["longitude"] = location
+    # A data já corrigida (timefix) quando não há data embutida
+    row["captured_at"] = reference_time(path)[0]
+    return row
+
+
+def bounding_box(lat, lon, km):
+    """
+    Retângulo de latitude/longitude que contém o círculo de raio `km`:
+    filtro que usa os índices antes da distância exata.
+    """
+    dlat = math.degrees(km / EARTH_RADIUS_KM)
+    dlon = math.degrees(km / EARTH_RADIUS_KM / max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def open_catalog(path=None):
+    """
+    Abre o catálogo; se não der (ex. sem permissão), a organização segue sem ele.
+    """
+    try:
+        return MediaCatalog(path)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+class MediaCatalog:
+    """
+    Catálogo (SQLite) de tudo que o organizador já moveu: bucket, duração,
+    resolução, rotação, codec, data de captura e GPS. Consultas como "Shorts
+    4K com mais de 30s perto de Seul" usam os índices, sem ffprobe.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or default_catalog_path())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Escrito por várias threads do Organizer (uma por disco), sempre com lock
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS media (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                bucket TEXT,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                duration REAL,
+                width INTEGER,
+                height INTEGER,
+                rotation INTEGER,
+                resolution INTEGER,
+                vertical INTEGER,
+                codec TEXT,
+                captured_at REAL,
+                latitude REAL,
+                longitude REAL,
+                cataloged_at REAL NOT NULL
+            )
+        """)
+        for column in ("bucket", "captured_at", "duration", "resolution", "latitude", "folder"):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS media_{column} ON media ({column})")
+
+    @staticmethod
+    def describe(path, bucket, dims=None, prober=None):
+        # Sem I/O no banco: o Organizer chama em paralelo, fora do lock
+        return describe(path, bucket, dims, prober)
+
+    def is_current(self, path, st):
+        row = self.conn.execute("SELECT size, mtime_ns FROM media WHERE path = ?", (path,)).fetchone()
+        return row is not None and (row["size"], row["mtime_ns"]) == (st.st_size, st.st_mtime_ns)
+
+    def record(self, row):
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO media ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [row[column] for column in COLUMNS],
+        )
+
+    def delete(self, path):
+        self.conn.execute("DELETE FROM media WHERE path = ?", (path,))
+
+    def prune(self, folder):
+        """
+        Remove do catálogo os arquivos da pasta que não existem mais. Retorna quantos.
+        """
+        missing = [row["path"] for row in self.query(folder=folder) if not os.path.exists(row["path"])]
+        for path in missing:
+            self.delete(path)
+        return len(missing)
+
+    def query(self, bucket=None, vertical=None, min_resolution=None, min_duration=None, max_duration=None,
+              after=None, before=None, near=None, codec=None, folder=None, limit=None):
+        """
+        Filtros combinados com AND. `near` = (lat, lon, km). Retorna sqlite3.Row
+        ordenadas pela data de captura.
+        """
+        where, params = [], []
+
+        def add(clause, *values):
+            where.append(clause)
+            params.extend(values)
+
+        if bucket:
+            add("bucket = ?", bucket)
+        if vertical is not None:
+            add("vertical = ?", int(vertical))
+        if min_resolution:
+            add("resolution >= ?", min_resolution)
+        if min_duration is not None:
+            add("duration >= ?", min_duration)
+        if max_duration is not None:
+            add("duration <= ?", max_duration)
+        if after is not None:
+            add("captured_at >= ?", after)
+        if before is not None:
+            add("captured_at < ?", before)
+        if codec:
+            add("codec = ?", codec)
+        if folder:
+            folder = os.path.abspath(folder)
+            add("(folder = ? OR folder LIKE ? ESCAPE '\\')", folder,
+                folder.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + os.sep + "%")
+        if near is not None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(*near)
+            add("latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?", min_lat, max_lat, min_lon, max_lon)
+
+        sql = "SELECT * FROM media"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY captured_at, path"
+        # Com `near` o LIMIT só vale depois da distância exata
+        if limit and near is None:
+            sql += f" LIMIT {int(limit)}"
+
+        rows = self.conn.execute(sql, params).fetchall()
+        if near is not None:
+            lat, lon, km = near
+            rows = [r for r in rows if distance_km(lat, lon, r["latitude"], r["longitude"]) <= km]
+            if limit:
+                rows = rows[:limit]
+        return rows
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,466 @@
+"""
+Organizador de mídia sem interface gráfica (não importa Qt).
+
+    python cli.py organize PASTA [PASTA ...]
+    python cli.py plan PASTA [PASTA ...] --output plano.json
+    python cli.py apply plano.json [--folder-map /Volumes/SSD=/mnt/ssd]
+    python cli.py rollback PASTA [PASTA ...]
+    python cli.py watch PASTA [PASTA ...] [--subfolders]
+    python cli.py dedup PASTA [PASTA ...] [--hardlink]
+    python cli.py timefix PASTA [PASTA ...] --profile seul.txt [--dry-run]
+    python cli.py offsets PASTA [PASTA ...] [--reference pocket3] [--output seul.json]
+    python cli.py catalog PASTA [PASTA ...]
+    python cli.py thumbs PASTA [PASTA ...] [--cols 4 --rows 4]
+    python cli.py query --bucket Shorts --min-resolution 2160 --min-duration 30 --near 37.57,126.98,50
+
+Cada evento é impresso em stdout como uma linha JSON.
+Códigos de saída: 0 = tudo certo, 1 = algum arquivo ou pasta falhou, 2 = uso incorreto.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from catalog import MediaCatalog, bucket_for_path
+from clockoffset import (DEFAULT_BIN_SECONDS, DEFAULT_MAX_HOURS, DEFAULT_MIN_FILES, DEFAULT_STEP_HOURS,
+                         ClockOffsetEstimator)
+from dedup import Deduplicator, HashIndex
+from mover import DEFAULT_COPY_WORKERS, JOURNAL_FILENAME, MoveEngine
+from moveplan import load_plan, save_plan
+from organizer import DEFAULT_PROBE_WORKERS, Organizer, is_ignored
+from thumbs import DEFAULT_COLS, DEFAULT_ROWS, DEFAULT_WIDTH, Thumbnailer
+from thumbs import DEFAULT_WORKERS as DEFAULT_THUMB_WORKERS
+from timecorrect import OffsetProfile, TimeCorrector, iter_files
+from watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_SECONDS, FolderWatcher
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_USAGE = 2
+
+
+def print_event(event):
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def check_folders(folders):
+    missing = [folder for folder in folders if not os.path.isdir(folder)]
+    for folder in missing:
+        print_event({"event": "folder_error", "folder": folder, "error": "Pasta não encontrada"})
+    return not missing
+
+
+def make_organizer(args):
+    dedup = None
+    if args.dedup:
+        dedup = Deduplicator(HashIndex(args.hash_index))
+    time_corrector = None
+    if args.time_profile:
+        time_corrector = TimeCorrector(OffsetProfile.load(args.time_profile))
+    catalog = None
+    if args.catalog is not None:
+        catalog = MediaCatalog(args.catalog or None)
+    thumbnailer = Thumbnailer() if args.thumbs else None
+    return Organizer(print_event, args.probe_workers, args.copy_workers,
+                     dedup=dedup, dedup_link=args.dedup == "hardlink", time_corrector=time_corrector,
+                     catalog=catalog, thumbnailer=thumbnailer)
+
+
+def close_organizer(organizer):
+    # Grava o último lote do catálogo e do índice de hashes
+    if organizer.catalog is not None:
+        organizer.catalog.close()
+    if organizer.dedup is not None:
+        organizer.dedup.index.close()
+
+
+def cmd_organize(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    organizer = make_organizer(args)
+    try:
+        summaries = organizer.run([os.path.abspath(folder) for folder in args.folders])
+    finally:
+        close_organizer(organizer)
+    failed = any(summary is None or summary["errors"] for summary in summaries)
+    return EXIT_ERRORS if failed else EXIT_OK
+
+
+def cmd_plan(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    organizer = Organizer(print_event, args.probe_workers)
+    plans = organizer.plan([os.path.abspath(folder) for folder in args.folders])
+    ok = [plan for plan in plans if plan is not None]
+    save_plan(args.output, ok)
+    print_event({"event": "plan_saved", "path": args.output, "folders": len(ok),
+                 "moves": sum(len(plan.moves) for plan in ok)})
+    return EXIT_OK if len(ok) == len(plans) else EXIT_ERRORS
+
+
+def cmd_apply(args):
+    try:
+        folder_map = [tuple(item.split("=", 1)) for item in args.folder_map]
+        plans = load_plan(args.plan, folder_map)
+    except (OSError, ValueError, KeyError) as e:
+        print_event({"event": "usage_error", "error": f"Plano inválido: {e}"})
+        return EXIT_USAGE
+    organizer = make_organizer(args)
+    try:
+        summaries = organizer.apply(plans)
+    finally:
+        close_organizer(organizer)
+    failed = any(summary is None or summary["errors"] for summary in summaries)
+    return EXIT_ERRORS if failed else EXIT_OK
+
+
+def cmd_rollback(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    status = EXIT_OK
+    for folder in args.folders:
+        engine = MoveEngine(os.path.join(os.path.abspath(folder), JOURNAL_FILENAME))
+        if not engine.has_pending():
+            print_event({"event": "rollback_skipped", "folder": folder})
+            continue
+        errors = engine.rollback()
+        for src, dest, error in errors:
+            print_event({"event": "move_error", "src": src, "dest": dest, "bucket": None, "error": str(error)})
+        print_event({"event": "rollback_done", "folder": folder, "errors": len(errors)})
+        if errors:
+            status = EXIT_ERRORS
+    return status
+
+
+def cmd_watch(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    organizer = make_organizer(args)
+    watcher = FolderWatcher(organizer, args.folders, subfolders=args.subfolders,
+                            settle=args.settle, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop())
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_organizer(organizer)
+    return EXIT_OK
+
+
+def cmd_dedup(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    errors = 0
+
+    def on_event(event):
+        nonlocal errors
+        if event["event"] == "dedup_error":
+            errors += 1
+        print_event(event)
+
+    organizer = Organizer(on_event, dedup=Deduplicator(HashIndex(args.hash_index)),
+                          dedup_link=args.hardlink)
+    duplicates = 0
+    try:
+        for folder in args.folders:
+            for dirpath, dirnames, filenames in os.walk(os.path.abspath(folder)):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    if not is_ignored(name) and organizer.check_duplicate(os.path.join(dirpath, name)):
+                        duplicates += 1
+    finally:
+        organizer.dedup.index.close()
+    print_event({"event": "dedup_done", "duplicates": duplicates, "errors": errors})
+    return EXIT_ERRORS if errors else EXIT_OK
+
+
+def load_profile(args):
+    rules = []
+    name = None
+    if args.profile:
+        profile = OffsetProfile.load(args.profile)
+        rules.extend(profile.rules)
+        name = profile.name
+    # --offset vem antes: sobrepõe as regras do arquivo
+    rules[:0] = [OffsetProfile.parse_rule(text) for text in args.offset]
+    return OffsetProfile(rules, name)
+
+
+def cmd_timefix(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    profile = load_profile(args)
+    if not profile.rules:
+        print_event({"event": "usage_error", "error": "Informe --profile ou --offset"})
+        return EXIT_USAGE
+
+    corrector = TimeCorrector(profile, use_embedded=not args.file_times)
+    paths = [path for folder in args.folders for path in iter_files(os.path.abspath(folder), is_ignored)]
+    errors = []
+    corrections = corrector.plan(paths, errors)
+    for c in corrections:
+        print_event({"event": "time_correction", "path": c.path, "hours": c.hours, "source": c.source,
+                     "base": c.base, "new_time": c.new_time, "dry_run": args.dry_run})
+    failed = [] if args.dry_run else corrector.apply(corrections)
+    errors += failed
+    for path, error in errors:
+        print_event({"event": "time_error", "path": path, "error": str(error)})
+    print_event({"event": "timefix_done", "files": len(corrections) - len(failed), "errors": len(errors)})
+    return EXIT_ERRORS if errors else EXIT_OK
+
+
+def cmd_offsets(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    estimator = ClockOffsetEstimator(bin_seconds=args.bin, max_hours=args.max_hours, step_hours=args.step,
+                                     min_files=args.min_files, use_embedded=not args.file_times)
+    paths = [path for folder in args.folders for path in iter_files(os.path.abspath(folder), is_ignored)]
+    groups = estimator.collect(paths, args.group)
+    if args.reference is not None and args.reference.lower() not in groups:
+        print_event({"event": "usage_error", "error": f"Aparelho de referência sem arquivos: {args.reference}",
+                     "devices": sorted(groups)})
+        return EXIT_USAGE
+
+    reference, offsets = estimator.estimate(groups, args.reference and args.reference.lower(), args.reference_offset)
+    for offset in offsets:
+        print_event({"event": "clock_offset", **offset.to_dict()})
+    profile = estimator.profile(offsets, args.name)
+    if args.output:
+        profile.save(args.output)
+    print_event({"event": "offsets_done", "reference": reference, "output": args.output,
+                 "profile": profile.to_dict()})
+    return EXIT_OK
+
+
+def cmd_catalog(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    catalog = MediaCatalog(args.catalog)
+    organizer = Organizer(print_event, args.probe_workers, catalog=catalog)
+    items = []
+    try:
+        for folder in args.folders:
+            removed = catalog.prune(folder)
+            if removed:
+                print_event({"event": "catalog_pruned", "folder": folder, "files": removed})
+            for path in iter_files(os.path.abspath(folder), is_ignored):
+                bucket = bucket_for_path(path)
+                if bucket is None:
+                    continue
+                # Já catalogado e sem mudanças: não lê de novo
+                try:
+                    if not args.refresh and catalog.is_current(path, os.stat(path)):
+                        continue
+                except OSError:
+                    # Apagado ou renomeado depois da listagem
+                    continue
+                items.append((path, bucket, None))
+        count = organizer.catalog_files(items)
+    finally:
+        catalog.close()
+    print_event({"event": "catalog_done", "files": count, "errors": len(items) - count})
+    return EXIT_ERRORS if count < len(items) else EXIT_OK
+
+
+def cmd_thumbs(args):
+    if not check_folders(args.folders):
+        return EXIT_USAGE
+    thumbnailer = Thumbnailer(args.cols, args.rows, args.width, args.workers, force=args.force)
+    status = EXIT_OK
+    for folder in args.folders:
+        folder = os.path.abspath(folder)
+        result = thumbnailer.run(folder)
+        for clip, error in result["errors"]:
+            print_event({"event": "thumb_error", "path": os.path.join(folder, clip), "error": error})
+            status = EXIT_ERRORS
+        print_event({"event": "thumbnails", "folder": folder, "generated": result["generated"],
+                     "cached": result["cached"], "errors": len(result["errors"])})
+    return status
+
+
+def parse_date(text):
+    """
+    "2024-05-01" ou "2024-05-01T18:30" no fuso local -> timestamp.
+    """
+    return datetime.fromisoformat(text).timestamp()
+
+
+def parse_near(text):
+    lat, lon, km = (float(part) for part in text.split(","))
+    return lat, lon, km
+
+
+def cmd_query(args):
+    if args.catalog and not os.path.exists(args.catalog):
+        print_event({"event": "usage_error", "error": f"Catálogo não encontrado: {args.catalog}"})
+        return EXIT_USAGE
+    vertical = True if args.vertical else False if args.horizontal else None
+    start = time.perf_counter()
+    with MediaCatalog(args.catalog) as catalog:
+        rows = catalog.query(bucket=args.bucket, vertical=vertical, min_resolution=args.min_resolution,
+                             min_duration=args.min_duration, max_duration=args.max_duration,
+                             after=args.after, before=args.before, near=args.near, codec=args.codec,
+                             folder=args.folder, limit=args.limit)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    if not args.count:
+        for row in rows:
+            print_event({"event": "media", **dict(row)})
+    print_event({"event": "query_done", "count": len(rows), "ms": elapsed_ms})
+    return EXIT_OK
+
+
+def add_catalog_path_option(parser):
+    parser.add_argument("--catalog", default=None,
+                        help="arquivo do catálogo (padrão: ~/.cache/sepshorts/catalog.sqlite)")
+
+
+def add_hash_index_option(parser):
+    parser.add_argument("--hash-index", default=None,
+                        help="índice de hashes (padrão: ~/.cache/sepshorts/hashes.sqlite)")
+
+
+def add_worker_options(parser):
+    parser.add_argument("--probe-workers", type=int, default=DEFAULT_PROBE_WORKERS,
+                        help="ffprobes em paralelo (padrão: %(default)s)")
+    parser.add_argument("--copy-workers", type=int, default=DEFAULT_COPY_WORKERS,
+                        help="cópias entre discos em paralelo (padrão: %(default)s)")
+    parser.add_argument("--dedup", choices=("report", "hardlink"), default=None,
+                        help="procura duplicatas depois de mover (report) e troca por hard links (hardlink)")
+    add_hash_index_option(parser)
+    parser.add_argument("--time-profile", default=None,
+                        help="perfil de offsets de horário aplicado aos arquivos movidos")
+    parser.add_argument("--catalog", nargs="?", const="", default=None, metavar="ARQUIVO",
+                        help="grava os arquivos movidos no catálogo (padrão: ~/.cache/sepshorts/catalog.sqlite)")
+    parser.add_argument("--thumbs", action="store_true",
+                        help="gera miniaturas e folhas de contato em Thumbs/ depois de mover")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sepshorts", description="Organizador de mídia (360, LRF, Videos, Shorts, Fotos)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    organize = sub.add_parser("organize", help="organiza as pastas")
+    organize.add_argument("folders", nargs="+")
+    add_worker_options(organize)
+    organize.set_defaults(func=cmd_organize)
+
+    plan = sub.add_parser("plan", help="calcula o plano de movimentos e grava em um arquivo, sem mover nada")
+    plan.add_argument("folders", nargs="+")
+    plan.add_argument("--output", "-o", required=True, help="arquivo do plano (JSON)")
+    plan.add_argument("--probe-workers", type=int, default=DEFAULT_PROBE_WORKERS,
+                      help="ffprobes em paralelo (padrão: %(default)s)")
+    plan.set_defaults(func=cmd_plan)
+
+    apply = sub.add_parser("apply", help="aplica um plano gravado por 'plan'")
+    apply.add_argument("plan")
+    apply.add_argument("--folder-map", action="append", default=[], metavar="ANTES=DEPOIS",
+                       help="troca o ponto de montagem das pastas do plano (pode repetir)")
+    add_worker_options(apply)
+    apply.set_defaults(func=cmd_apply)
+
+    rollback = sub.add_parser("rollback", help="desfaz uma organização interrompida")
+    rollback.add_argument("folders", nargs="+")
+    rollback.set_defaults(func=cmd_rollback)
+
+    watch = sub.add_parser("watch", help="observa as pastas e organiza os arquivos novos")
+    watch.add_argument("folders", nargs="+")
+    watch.add_argument("--subfolders", action="store_true",
+                       help="cada subpasta (dump de cartão) é organizada separadamente")
+    watch.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                       help="segundos sem crescer antes de mover um arquivo (padrão: %(default)s)")
+    watch.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                       help="intervalo de verificação em segundos (padrão: %(default)s)")
+    add_worker_options(watch)
+    watch.set_defaults(func=cmd_watch)
+
+    dedup = sub.add_parser("dedup", help="procura arquivos duplicados nas pastas (recursivo)")
+    dedup.add_argument("folders", nargs="+")
+    dedup.add_argument("--hardlink", action="store_true", help="troca as duplicatas por hard links")
+    add_hash_index_option(dedup)
+    dedup.set_defaults(func=cmd_dedup)
+
+    timefix = sub.add_parser("timefix", help="corrige datas por dispositivo (substitui o tmzcorrect.sh)")
+    timefix.add_argument("folders", nargs="+")
+    timefix.add_argument("--profile", default=None, help="arquivo de perfil (JSON ou 'padrão, horas' por linha)")
+    timefix.add_argument("--offset", action="append", default=[], metavar="PADRÃO=HORAS",
+                         help="regra avulsa, ex. --offset pocket3=+12 (pode repetir)")
+    timefix.add_argument("--file-times", action="store_true",
+                         help="ignora a data embutida (EXIF/mvhd) e usa a data do arquivo")
+    timefix.add_argument("--dry-run", action="store_true", help="só mostra o que seria alterado")
+    timefix.set_defaults(func=cmd_timefix)
+
+    offsets = sub.add_parser("offsets", help="estima o offset de relógio de cada aparelho e gera um perfil")
+    offsets.add_argument("folders", nargs="+")
+    offsets.add_argument("--reference", default=None,
+                         help="aparelho de referência (padrão: o que tem mais arquivos)")
+    offsets.add_argument("--reference-offset", type=float, default=0.0, metavar="HORAS",
+                         help="offset do próprio aparelho de referência (padrão: %(default)s)")
+    offsets.add_argument("--group", action="append", default=[], metavar="PADRÃO",
+                         help="agrupa por padrão de nome em vez do prefixo automático (pode repetir)")
+    offsets.add_argument("--bin", type=float, default=DEFAULT_BIN_SECONDS,
+                         help="largura do histograma em segundos (padrão: %(default)s)")
+    offsets.add_argument("--max-hours", type=float, default=DEFAULT_MAX_HOURS,
+                         help="maior deslocamento procurado (padrão: %(default)s)")
+    offsets.add_argument("--step", type=float, default=DEFAULT_STEP_HOURS,
+                         help="arredonda o offset a múltiplos de HORAS; 0 não arredonda (padrão: %(default)s)")
+    offsets.add_argument("--min-files", type=int, default=DEFAULT_MIN_FILES,
+                         help="aparelhos com menos arquivos ficam de fora (padrão: %(default)s)")
+    offsets.add_argument("--file-times", action="store_true",
+                         help="ignora a data embutida (EXIF/mvhd) e usa a data do arquivo")
+    offsets.add_argument("--name", default=None, help="nome do perfil gerado")
+    offsets.add_argument("--output", default=None, help="grava o perfil (JSON) para usar em timefix --profile")
+    offsets.set_defaults(func=cmd_offsets)
+
+    catalog = sub.add_parser("catalog", help="cataloga pastas já organizadas (recursivo)")
+    catalog.add_argument("folders", nargs="+")
+    catalog.add_argument("--refresh", action="store_true", help="relê também os arquivos que não mudaram")
+    catalog.add_argument("--probe-workers", type=int, default=DEFAULT_PROBE_WORKERS,
+                         help="leituras em paralelo (padrão: %(default)s)")
+    add_catalog_path_option(catalog)
+    catalog.set_defaults(func=cmd_catalog)
+
+    thumbs = sub.add_parser("thumbs", help="miniaturas e folhas de contato dos clipes (usa o proxy LRF)")
+    thumbs.add_argument("folders", nargs="+")
+    thumbs.add_argument("--cols", type=int, default=DEFAULT_COLS)
+    thumbs.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    thumbs.add_argument("--width", type=int, default=DEFAULT_WIDTH, help="largura de cada quadro (padrão: %(default)s)")
+    thumbs.add_argument("--workers", type=int, default=DEFAULT_THUMB_WORKERS,
+                        help="ffmpegs em paralelo (padrão: %(default)s)")
+    thumbs.add_argument("--force", action="store_true", help="gera de novo mesmo o que está em cache")
+    thumbs.set_defaults(func=cmd_thumbs)
+
+    query = sub.add_parser("query", help="consulta o catálogo")
+    query.add_argument("--bucket", choices=("360", "LRF", "Videos", "Shorts", "Fotos"), default=None)
+    orientation = query.add_mutually_exclusive_group()
+    orientation.add_argument("--vertical", action="store_true")
+    orientation.add_argument("--horizontal", action="store_true")
+    query.add_argument("--min-resolution", type=int, default=None, metavar="PIXELS",
+                       help="lado menor mínimo, ex. 2160 para 4K")
+    query.add_argument("--min-duration", type=float, default=None, metavar="SEGUNDOS")
+    query.add_argument("--max-duration", type=float, default=None, metavar="SEGUNDOS")
+    query.add_argument("--after", type=parse_date, default=None, metavar="DATA",
+                       help="capturados a partir de DATA (ex. 2024-05-01)")
+    query.add_argument("--before", type=parse_date, default=None, metavar="DATA")
+    query.add_argument("--near", type=parse_near, default=None, metavar="LAT,LON,KM",
+                       help="até KM de distância, ex. 37.57,126.98,50 (Seul)")
+    query.add_argument("--codec", default=None, help="nome do ffprobe, ex. hevc, h264")
+    query.add_argument("--folder", default=None, help="só arquivos dentro desta pasta")
+    query.add_argument("--limit", type=int, default=None)
+    query.add_argument("--count", action="store_true", help="mostra só a contagem")
+    add_catalog_path_option(query)
+    query.set_defaults(func=cmd_query)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from timecorrect import DEFAULT_WORKERS, SEPARATORS, OffsetProfile, reference_time
+
+DEFAULT_BIN_SECONDS = 300
+DEFAULT_SMOOTH_BINS = 3
+DEFAULT_MAX_HOURS = 26
+DEFAULT_STEP_HOURS = 1.0
+DEFAULT_MIN_FILES = 5
+
+
+def device_key(filename):
+    """
+    Prefixo do nome que identifica o aparelho, sem numeração nem datas:
+    "pocket3-0001.mp4" -> "pocket3", "DJI_20240501_0003.MP4" -> "dji",
+    "x-pocket3-0007.mp4" -> "x-pocket3", "IMG1234.JPG" -> "img".
+    """
+    stem = os.path.splitext(filename)[0].lower()
+    tokens = [t for t in SEPARATORS.split(stem) if t]
+    kept = [t for t in tokens if not t.isdigit()]
+    if kept and tokens and kept[-1] is tokens[-1]:
+        # Numeração colada no nome ("IMG1234")
+        kept[-1] = kept[-1].rstrip("0123456789") or kept[-1]
+    return "-".join(kept) or None
+
+
+class DeviceOffset:
+    def __init__(self, device, files, hours, measured_hours, score, reference=False):
+        self.device = device
+        self.files = files
+        self.hours = hours                    # offset final, arredondado ao passo
+        self.measured_hours = measured_hours  # deslocamento medido, sem arredondar
+        self.score = score                    # similaridade (0..1) no melhor deslocamento
+        self.reference = reference
+
+    def to_dict(self):
+        return {"device": self.device, "files": self.files, "hours": self.hours,
+                "measured_hours": self.measured_hours, "score": self.score,
+                "reference": self.reference}
+
+    def __repr__(self):
+        return f"{self.device}: {self.hours:+g}h (score {self.score})"
+
+
+class ClockOffsetEstimator:
+    """
+    Descobre o offset de relógio de cada aparelho em relação a um de
+    referência. Todos filmam as mesmas saídas, então as rajadas de captura
+    de cada um são a mesma sequência deslocada no tempo: monta um histograma
+    por aparelho e procura, por correlação cruzada (FFT sobre a matriz de
+    histogramas, todos os aparelhos de uma vez), o deslocamento que melhor
+    sobrepõe as rajadas às da referência.
+    """
+
+    def __init__(self, bin_seconds=DEFAULT_BIN_SECONDS, smooth_bins=DEFAULT_SMOOTH_BINS,
+                 max_hours=DEFAULT_MAX_HOURS, step_hours=DEFAULT_STEP_HOURS,
+                 min_files=DEFAULT_MIN_FILES, workers=DEFAULT_WORKERS, use_embedded=True):
+        self.bin_seconds = bin_seconds
+        self.smooth_bins = max(1, smooth_bins)
+        self.max_hours = max_hours
+        self.step_hours = step_hours
+        self.min_files = min_files
+        self.workers = max(1, workers)
+        self.use_embedded = use_embedded
+
+    def _read_time(self, path):
+        try:
+            return reference_time(path, self.use_embedded)[0]
+        except OSError:
+            return None
+
+    def collect(self, paths, patterns=None):
+        """
+        Lê as datas em paralelo e agrupa por aparelho: pelo primeiro padrão de
+        `patterns` que casar com o nome, ou pelo prefixo (device_key).
+        Retorna {aparelho: np.array de timestamps}.
+        """
+        matcher = OffsetProfile([(pattern, 0) for pattern in patterns]) if patterns else None
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            times = list(pool.map(self._read_time, paths))
+
+        groups = {}
+        for path, ts in zip(paths, times):
+            if ts is None:
+                continue
+            name = os.path.basename(path)
+            if matcher is not None:
+                rule = matcher.match(name)
+                key = rule[0].lower() if rule else None
+            else:
+                key = device_key(name)
+            if key is not None:
+                groups.setdefault(key, []).append(ts)
+        return {key: np.asarray(values, dtype=np.float64) for key, values in groups.items()}
+
+    def _histograms(self, groups, devices, origin, bins):
+        """
+        Matriz (aparelhos x bins) com log(1 + contagem) suavizado: uma rajada de
+        200 fotos não pode pesar mais que várias cenas em comum.
+        """
+        rows = []
+        for device in devices:
+            idx = ((groups[device] - origin) // self.bin_seconds).astype(np.int64)
+            idx = idx[(idx >= 0) & (idx < bins)]
+            rows.append(np.bincount(idx, minlength=bins))
+        matrix = np.log1p(np.vstack(rows).astype(np.float64))
+        if self.smooth_bins > 1:
+            # Soma acumulada: média móvel em todas as linhas sem laço em Python
+            padded = np.pad(matrix, ((0, 0), (self.smooth_bins // 2, (self.smooth_bins - 1) // 2)))
+            csum = np.cumsum(padded, axis=1)
+            csum = np.pad(csum, ((0, 0), (1, 0)))
+            matrix = (csum[:, self.smooth_bins:] - csum[:, :-self.smooth_bins]) / self.smooth_bins
+        return matrix
+
+    def estimate(self, groups, reference=None, reference_hours=0.0):
+        """
+        Retorna (referência, [DeviceOffset]). A referência padrão é o aparelho
+        com mais arquivos; `reference_hours` é o offset dela própria (0 se o
+        relógio dela está certo). Aparelhos com menos de `min_files` arquivos
+        ou sem sobreposição nenhuma ficam com hours=None.
+        """
+        if not groups:
+            return None, []
+        if reference is None:
+            reference = max(groups, key=lambda key: (len(groups[key]), key))
+        if reference not in groups:
+            raise KeyError(reference)
+
+        max_lag = int(np.ceil(self.max_hours * 3600 / self.bin_seconds))
+        ref_times = groups[reference]
+        # A grade cobre só o período da referência mais a folga máxima: arquivos
+        # fora dela não conseguiriam se alinhar com nenhum deslocamento permitido
+        origin = ref_times.min() - max_lag * self.bin_seconds
+        bins = int((ref_times.max() - origin) // self.bin_seconds) + max_lag + 1
+
+        others = sorted(key for key in groups if key != reference and len(groups[key]) >= self.min_files)
+        results = [DeviceOffset(reference, len(ref_times), reference_hours, 0.0, 1.0, reference=True)]
+        if others:
+            matrix = self._histograms(groups, [reference] + others, origin, bins)
+            # Correlação circular sem sobreposição: comprimento >= 2x a grade
+            n = 1 << int(np.ceil(np.log2(2 * bins)))
+            spectra = np.fft.rfft(matrix, n, axis=1)
+            corr = np.fft.irfft(spectra[:1] * np.conj(spectra[1:]), n, axis=1)
+            # corr[k] = sum_t ref[t + k] * dev[t]; lags negativos ficam no fim do vetor
+            lags = np.arange(-max_lag, max_lag + 1)
+            window = corr[:, lags % n]
+            best = window.argmax(axis=1)
+            norms = np.sqrt((matrix[:1] ** 2).sum() * (matrix[1:] ** 2).sum(axis=1))
+            scores = window[np.arange(len(others)), best] / np.where(norms > 0, norms, 1)
+
+            for row, device in enumerate(others):
+                measured = lags[best[row]] * self.bin_seconds / 3600
+                score = round(float(scores[row]), 3)
+                hours = None
+                if score > 0:
+                    hours = reference_hours + measured
+                    if self.step_hours:
+                        hours = round(hours / self.step_hours) * self.step_hours
+                    hours = float(hours)
+                results.append(DeviceOffset(device, len(groups[device]), hours,
+                                            round(float(measured), 3), score))
+
+        for device in sorted(groups):
+            if device != reference and len(groups[device]) < self.min_files:
+                results.append(DeviceOffset(device, len(groups[device]), None, None, 0.0))
+        return reference, results
+
+    @staticmethod
+    def profile(offsets, name=None):
+        """
+        Perfil para o TimeCorrector/timefix com os offsets diferentes de zero.
+        Padrões mais longos primeiro, para "x-pocket3" vencer "x".
+        """
+        rules = [(o.device, o.hours) for o in offsets if o.hours]
+        rules.sort(key=lambda rule: -len(rule[0]))
+        return OffsetProfile(rules, name)
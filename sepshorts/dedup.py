@@ -0,0 +1,191 @@
+import hashlib
+import os
+import sqlite3
+
+from mover import PART_SUFFIX
+
+QUICK_CHUNK = 64 * 1024
+FULL_BUFFER = 8 * 1024 * 1024
+
+
+def default_index_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "sepshorts", "hashes.sqlite")
+
+
+def quick_hash(path, size):
+    """
+    Hash do primeiro e do último bloco (mais o tamanho): separa quase todos os
+    arquivos de mesmo tamanho lendo só 128 KB.
+    """
+    digest = hashlib.blake2b(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(QUICK_CHUNK))
+        if size > QUICK_CHUNK:
+            f.seek(max(QUICK_CHUNK, size - QUICK_CHUNK))
+            digest.update(f.read(QUICK_CHUNK))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    digest = hashlib.blake2b()
+    buf = bytearray(FULL_BUFFER)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class HashIndex:
+    """
+    Índice persistente (SQLite) de tamanho e hashes de todos os arquivos já
+    vistos, compartilhado entre execuções e bibliotecas. Hashes só são
+    reaproveitados se tamanho, mtime e inode continuarem iguais.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.abspath(path or default_index_path())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # O Organizer usa o índice de várias threads (uma por disco), sempre com lock
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dev INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                quick_hash TEXT,
+                full_hash TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+
+    def get(self, path):
+        return self.conn.execute("SELECT * FROM files WHERE path = ?", (path,)).fetchone()
+
+    def same_size(self, size, exclude_path):
+        return self.conn.execute(
+            "SELECT * FROM files WHERE size = ? AND path != ? ORDER BY path", (size, exclude_path)
+        ).fetchall()
+
+    def register(self, path, st):
+        """
+        Grava o estado atual do arquivo. Se ele mudou desde a última vez, os
+        hashes antigos são descartados.
+        """
+        row = self.get(path)
+        if row is not None and _matches(row, st):
+            return row
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, NULL, NULL)",
+            (path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns),
+        )
+        return self.get(path)
+
+    def set_hash(self, path, column, value):
+        self.conn.execute(f"UPDATE files SET {column} = ? WHERE path = ?", (value, path))
+
+    def delete(self, path):
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _matches(row, st):
+    return (row["dev"], row["inode"], row["size"], row["mtime_ns"]) == (
+        st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class Deduplicator:
+    """
+    Detecta duplicatas em camadas: tamanho -> hash do início/fim -> hash completo.
+    Cada camada só é calculada quando a anterior colide.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def _hash(self, row, column, func):
+        if row[column] is None:
+            value = func(row["path"], row["size"]) if column == "quick_hash" else func(row["path"])
+            self.index.set_hash(row["path"], column, value)
+            return value
+        return row[column]
+
+    def _valid_candidates(self, path, st):
+        candidates = []
+        for row in self.index.same_size(st.st_size, path):
+            try:
+                cand_st = os.stat(row["path"])
+            except OSError:
+                # Só sai do índice se a pasta está lá e o arquivo não: com a
+                # pasta ausente o disco pode só estar desconectado agora
+                if os.path.isdir(os.path.dirname(row["path"])) and not os.path.lexists(row["path"]):
+                    self.index.delete(row["path"])
+                continue
+            # Já é o mesmo arquivo (hard link)
+            if (cand_st.st_dev, cand_st.st_ino) == (st.st_dev, st.st_ino):
+                continue
+            if not _matches(row, cand_st):
+                row = self.index.register(row["path"], cand_st)
+                if row["size"] != st.st_size:
+                    continue
+            candidates.append(row)
+        return candidates
+
+    def check(self, path, st=None):
+        """
+        Registra o arquivo no índice e retorna o caminho de um arquivo idêntico
+        já conhecido, ou None.
+        """
+        if st is None:
+            st = os.stat(path)
+        row = self.index.register(path, st)
+        if st.st_size == 0:
+            return None
+
+        candidates = self._valid_candidates(path, st)
+        if not candidates:
+            return None
+
+        quick = self._hash(row, "quick_hash", quick_hash)
+        candidates = [c for c in candidates if self._hash(c, "quick_hash", quick_hash) == quick]
+        if not candidates:
+            return None
+
+        full = self._hash(row, "full_hash", full_hash)
+        for candidate in candidates:
+            if self._hash(candidate, "full_hash", full_hash) == full:
+                return candidate["path"]
+        return None
+
+    def link(self, original, duplicate):
+        """
+        Troca `duplicate` por um hard link para `original` (mesmo disco).
+        """
+        tmp = duplicate + PART_SUFFIX
+        os.link(original, tmp)
+        os.replace(tmp, duplicate)
+        # O inode mudou, mas o conteúdo é o mesmo: reaproveita os hashes
+        source = self.index.get(original)
+        self.index.register(duplicate, os.stat(duplicate))
+        if source is not None:
+            self.index.set_hash(duplicate, "quick_hash", source["quick_hash"])
+            self.index.set_hash(duplicate, "full_hash", source["full_hash"])
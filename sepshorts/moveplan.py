@@ -0,0 +1,121 @@
+import json
+import os
+import socket
+import time
+
+PLAN_VERSION = 1
+MTIME_TOLERANCE_NS = 2_000_000_000
+
+
+class PlannedMove:
+    def __init__(self, src, dest, bucket, dims=None, reason=None, size=None, mtime_ns=None):
+        self.src = src
+        self.dest = dest
+        self.bucket = bucket  # 360, LRF, Videos, Shorts, Fotos
+        self.dims = dims      # (largura, altura, rotação) dos vídeos analisados
+        self.reason = reason  # por que foi para esse bucket (para revisão do plano)
+        # Estado da origem no planejamento: o apply recusa arquivos que mudaram
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self):
+        return f"{self.bucket}: {self.src} -> {self.dest}"
+
+
+class FolderPlan:
+    """
+    Plano de uma pasta. No arquivo os caminhos são relativos à pasta, então
+    o mesmo plano vale em outra máquina que monte o disco em outro lugar.
+    """
+
+    def __init__(self, folder, moves, videos=0):
+        self.folder = folder
+        self.moves = moves
+        self.videos = videos
+
+    def to_dict(self):
+        def rel(path):
+            return os.path.relpath(path, self.folder)
+
+        return {
+            "folder": self.folder,
+            "videos": self.videos,
+            "moves": [{"src": rel(m.src), "dest": rel(m.dest), "bucket": m.bucket, "reason": m.reason,
+                       "dims": list(m.dims) if m.dims else None, "size": m.size, "mtime_ns": m.mtime_ns}
+                      for m in self.moves],
+        }
+
+    @classmethod
+    def from_dict(cls, data, folder=None):
+        folder = folder or data["folder"]
+        moves = [PlannedMove(os.path.normpath(os.path.join(folder, m["src"])),
+                             os.path.normpath(os.path.join(folder, m["dest"])), m["bucket"],
+                             tuple(m["dims"]) if m.get("dims") else None, m.get("reason"),
+                             m.get("size"), m.get("mtime_ns"))
+                 for m in data["moves"]]
+        return cls(folder, moves, data.get("videos", 0))
+
+
+def remap_folder(folder, folder_map):
+    """
+    Troca o ponto de montagem: [("/Volumes/SSD", "/mnt/ssd")] leva
+    "/Volumes/SSD/viagem" para "/mnt/ssd/viagem".
+    """
+    for old, new in folder_map:
+        old = old.rstrip(os.sep)
+        if folder == old or folder.startswith(old + os.sep):
+            return new.rstrip(os.sep) + folder[len(old):]
+    return folder
+
+
+def save_plan(path, plans):
+    """
+    Grava os planos (lista de FolderPlan) em JSON, de forma atômica.
+    """
+    data = {
+        "version": PLAN_VERSION,
+        "created_at": time.time(),
+        "host": socket.gethostname(),
+        "folders": [plan.to_dict() for plan in plans],
+    }
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_plan(path, folder_map=()):
+    """
+    Lê um plano gravado por save_plan. Retorna a lista de FolderPlan.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get("version") != PLAN_VERSION:
+        raise ValueError(f"versão de plano não suportada: {data.get('version')}")
+    return [FolderPlan.from_dict(folder, remap_folder(folder["folder"], folder_map))
+            for folder in data["folders"]]
+
+
+def check_move(move):
+    """
+    Confere se a origem ainda é o arquivo que foi planejado. Retorna None
+    (pode mover), "done" (já está no destino) ou a mensagem de erro.
+    """
+    try:
+        st = os.stat(move.src)
+    except FileNotFoundError:
+        # Sem tamanho no plano, basta o destino existir; sem destino o arquivo sumiu
+        try:
+            if os.stat(move.dest).st_size == move.size or move.size is None:
+                return "done"
+        except FileNotFoundError:
+            pass
+        return "Arquivo não existe mais"
+    if move.size is not None and st.st_size != move.size:
+        return "Arquivo mudou depois do plano"
+    # Outra máquina pode ver o mtime com menos precisão (SMB, NFS, exFAT)
+    if move.mtime_ns is not None and abs(st.st_mtime_ns - move.mtime_ns) > MTIME_TOLERANCE_NS:
+        return "Arquivo mudou depois do plano"
+    return None
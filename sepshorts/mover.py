@@ -0,0 +1,244 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+JOURNAL_FILENAME = ".sepshorts-journal.jsonl"
+PART_SUFFIX = ".sepshorts-part"
+
+DEFAULT_BUFFER_SIZE = 8 * 1024 * 1024
+DEFAULT_COPY_WORKERS = 4
+
+
+class VerificationError(Exception):
+    pass
+
+
+def _same_device(src, dest):
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(dest)).st_dev
+    except OSError:
+        return False
+
+
+def _drop_page_cache(fd):
+    # Garante que a verificação relê do disco, não da memória
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+def _hash_file(path, buffer_size):
+    digest = hashlib.blake2b()
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        _drop_page_cache(f.fileno())
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
+class MoveEngine:
+    """
+    Move arquivos com rename atômico quando origem e destino estão no mesmo
+    disco. Entre discos faz cópia em blocos grandes (várias em paralelo),
+    confere o checksum lendo o destino de volta e só então apaga a origem.
+    Tudo é registrado em um journal para retomar ou desfazer uma execução
+    interrompida (ex. cartão SD removido no meio).
+    """
+
+    def __init__(self, journal_path, workers=DEFAULT_COPY_WORKERS,
+                 buffer_size=DEFAULT_BUFFER_SIZE, progress=None):
+        self.journal_path = journal_path
+        self.workers = max(1, workers)
+        self.buffer_size = buffer_size
+        # progress(src, bytes_copiados, total) — chamado das threads de cópia
+        self.progress = progress
+        self._lock = threading.Lock()
+        self._journal = None
+
+    # --- Journal ---
+    def _write(self, *records, sync=False):
+        with self._lock:
+            for record in records:
+                self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            # Só o plano precisa de fsync: na retomada, origem ausente já
+            # indica movimento concluído mesmo sem o registro "done"
+            if sync:
+                os.fsync(self._journal.fileno())
+
+    def read_journal(self):
+        """
+        Retorna (movimentos planejados, conjunto dos já concluídos).
+        """
+        planned = []
+        done = set()
+        try:
+            with open(self.journal_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Última linha pode ter ficado pela metade
+                        continue
+                    key = (record["src"], record["dest"])
+                    if record["op"] == "plan":
+                        planned.append(key)
+                    elif record["op"] == "done":
+                        done.add(key)
+        except FileNotFoundError:
+            pass
+        return planned, done
+
+    def has_pending(self):
+        """
+        True se o journal tem movimento planejado e ainda não concluído.
+        """
+        planned, done = self.read_journal()
+        return any(key not in done for key in planned)
+
+    # --- Movimentação ---
+    def _copy_verified(self, src, dest):
+        part = dest + PART_SUFFIX
+        total = os.path.getsize(src)
+        digest = hashlib.blake2b()
+        buf = bytearray(self.buffer_size)
+        view = memoryview(buf)
+        copied = 0
+
+        with open(src, 'rb', buffering=0) as fsrc, open(part, 'wb', buffering=0) as fdst:
+            while True:
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                digest.update(view[:n])
+                fdst.write(view[:n])
+                copied += n
+                if self.progress:
+                    self.progress(src, copied, total)
+            os.fsync(fdst.fileno())
+
+        if _hash_file(part, self.buffer_size) != digest.hexdigest():
+            os.remove(part)
+            raise VerificationError(f"Checksum diferente após copiar {src}")
+
+        shutil.copystat(src, part)
+        os.replace(part, dest)
+        os.remove(src)
+
+    def move_one(self, src, dest, same_device=None):
+        if same_device is None:
+            same_device = _same_device(src, dest)
+        if same_device:
+            try:
+                os.replace(src, dest)
+                return
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        self._copy_verified(src, dest)
+
+    def _run_one(self, src, dest, same_device=None):
+        try:
+            self.move_one(src, dest, same_device)
+        except Exception as e:
+            return e
+        self._write({"op": "done", "src": src, "dest": dest})
+        return None
+
+    def _execute(self, moves):
+        results = [None] * len(moves)
+        copies = []
+
+        # Renames no mesmo disco são instantâneos: feitos em sequência.
+        # Cópias entre discos vão para o pool.
+        for idx, (src, dest) in enumerate(moves):
+            if _same_device(src, dest):
+                results[idx] = self._run_one(src, dest, same_device=True)
+            else:
+                copies.append(idx)
+
+        if copies:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = [(idx, pool.submit(self._run_one, *moves[idx], False)) for idx in copies]
+                for idx, future in futures:
+                    results[idx] = future.result()
+        return results
+
+    def run(self, moves):
+        """
+        Executa a lista de (origem, destino). Retorna uma lista alinhada com
+        `moves` contendo None (sucesso) ou a exceção de cada arquivo.
+        O journal só é apagado se todos os arquivos forem movidos. Ele vale
+        para uma execução só: o de uma execução anterior (que a retomada já
+        tentou concluir) é descartado, e rollback nunca desfaz movimentos dela.
+        """
+        moves = list(moves)
+        with open(self.journal_path, 'w', encoding='utf-8') as journal:
+            self._journal = journal
+            self._write(*({"op": "plan", "src": src, "dest": dest} for src, dest in moves), sync=True)
+            results = self._execute(moves)
+            self._journal = None
+
+        if not any(results):
+            os.remove(self.journal_path)
+        return results
+
+    def resume(self):
+        """
+        Conclui os movimentos pendentes de uma execução interrompida.
+        Retorna a lista de (origem, destino, erro ou None) que foram tentados.
+        """
+        planned, done = self.read_journal()
+        pending = []
+        for src, dest in planned:
+            if (src, dest) in done:
+                continue
+            self._discard_part(dest)
+            if os.path.exists(src):
+                pending.append((src, dest))
+
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            self._journal = journal
+            results = self._execute(pending)
+            self._journal = None
+
+        if not any(results):
+            os.remove(self.journal_path)
+        return [(src, dest, err) for (src, dest), err in zip(pending, results)]
+
+    def rollback(self):
+        """
+        Desfaz uma execução interrompida: devolve os arquivos já movidos para
+        a origem e apaga cópias parciais. Retorna a lista de erros.
+        """
+        planned, done = self.read_journal()
+        errors = []
+        for src, dest in reversed(planned):
+            self._discard_part(dest)
+            if (src, dest) in done or (not os.path.exists(src) and os.path.exists(dest)):
+                try:
+                    self.move_one(dest, src)
+                except Exception as e:
+                    errors.append((dest, src, e))
+
+        if not errors:
+            os.remove(self.journal_path)
+        return errors
+
+    @staticmethod
+    def _discard_part(dest):
+        try:
+            os.remove(dest + PART_SUFFIX)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,352 @@
+import math
+import os
+import re
+import struct
+
+# Extensões que usam a estrutura de caixas ISO BMFF / QuickTime
+MP4_EXTS = ('.mp4', '.mov', '.m4v')
+
+
+class BoxError(Exception):
+    pass
+
+
+def iter_boxes(f, start, end):
+    """
+    Percorre as caixas (atoms) entre `start` e `end` sem ler o conteúdo.
+    Gera (tipo, início do payload, fim da caixa).
+    """
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            raise BoxError("cabeçalho truncado")
+        size, box_type = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                raise BoxError("cabeçalho truncado")
+            size = struct.unpack(">Q", large)[0]
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos or pos + size > end:
+            raise BoxError(f"tamanho inválido em {box_type!r}")
+        yield box_type, payload, pos + size
+        pos += size
+
+
+def find_box(f, start, end, box_type):
+    for found, payload, box_end in iter_boxes(f, start, end):
+        if found == box_type:
+            return payload, box_end
+    return None
+
+
+def find_path(f, start, end, path):
+    """
+    Desce por uma sequência de tipos, ex. (b"mdia", b"minf", b"stbl").
+    """
+    span = (start, end)
+    for box_type in path:
+        span = find_box(f, span[0], span[1], box_type)
+        if span is None:
+            return None
+    return span
+
+
+def _read(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) < size:
+        raise BoxError("caixa truncada")
+    return data
+
+
+def _parse_tkhd(f, payload):
+    version = _read(f, payload, 1)[0]
+    # version(1) flags(3) + datas/track_id/duração: 20 bytes (v0) ou 32 (v1)
+    offset = payload + (36 if version == 1 else 24)
+    # reserved(8) layer(2) alternate_group(2) volume(2) reserved(2)
+    offset += 16
+    matrix = struct.unpack(">9i", _read(f, offset, 36))
+    width, height = struct.unpack(">II", _read(f, offset + 36, 8))
+    return matrix, width >> 16, height >> 16
+
+
+def _matrix_rotation(matrix):
+    """
+    Mesmo cálculo do av_display_rotation_get do FFmpeg, então o valor bate
+    com o 'rotation' do side_data_list que o ffprobe mostra.
+    """
+    a, b = matrix[0] / 65536, matrix[1] / 65536
+    c, d = matrix[3] / 65536, matrix[4] / 65536
+    scale_x = math.hypot(a, c)
+    scale_y = math.hypot(b, d)
+    if scale_x == 0 or scale_y == 0:
+        return 0
+    return -round(math.degrees(math.atan2(b / scale_y, a / scale_x)))
+
+
+def _handler_type(f, mdia):
+    hdlr = find_box(f, mdia[0], mdia[1], b"hdlr")
+    if hdlr is None:
+        return None
+    # version/flags(4) pre_defined(4) handler_type(4)
+    return _read(f, hdlr[0] + 8, 4)
+
+
+def _sample_entry_size(f, stbl):
+    stsd = find_box(f, stbl[0], stbl[1], b"stsd")
+    if stsd is None:
+        return None
+    # version/flags(4) entry_count(4), depois a primeira VisualSampleEntry:
+    # size(4) format(4) reserved(6) data_ref(2) pre_defined/reserved(16) width(2) height(2)
+    entry = stsd[0] + 8
+    if entry + 36 > stsd[1]:
+        return None
+    return struct.unpack(">HH", _read(f, entry + 32, 4))
+
+
+def read_video_dimensions(file_path):
+    """
+    Lê (largura, altura, rotação) da primeira trilha de vídeo de um MP4/MOV
+    lendo só os cabeçalhos (moov/trak/tkhd e stsd), sem ffprobe.
+    Retorna None se o arquivo não puder ser interpretado.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            first = _read(f, 4, 4)
+            if not first.isalpha():
+                return None
+
+            moov = find_box(f, 0, end, b"moov")
+            if moov is None:
+                return None
+
+            for box_type, payload, box_end in iter_boxes(f, moov[0], moov[1]):
+                if box_type != b"trak":
+                    continue
+                mdia = find_box(f, payload, box_end, b"mdia")
+                if mdia is None or _handler_type(f, mdia) != b"vide":
+                    continue
+                tkhd = find_box(f, payload, box_end, b"tkhd")
+                if tkhd is None:
+                    return None
+
+                matrix, width, height = _parse_tkhd(f, tkhd[0])
+                # Tamanho codificado (o mesmo que o ffprobe reporta) quando disponível
+                stbl = find_path(f, mdia[0], mdia[1], (b"minf", b"stbl"))
+                coded = _sample_entry_size(f, stbl) if stbl else None
+                if coded and coded[0] and coded[1]:
+                    width, height = coded
+
+                return (width, height, abs(_matrix_rotation(matrix)) % 360)
+    except (OSError, BoxError, struct.error):
+        return None
+    return None
+
+
+# Segundos entre 1904-01-01 (época do QuickTime) e 1970-01-01
+QUICKTIME_EPOCH_OFFSET = 2082844800
+
+
+def read_creation_time(file_path):
+    """
+    Lê o creation_time do moov/mvhd (segundos desde 1904, em UTC pela
+    especificação) e retorna como timestamp Unix, ou None.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            if not _read(f, 4, 4).isalpha():
+                return None
+            mvhd = find_path(f, 0, end, (b"moov", b"mvhd"))
+            if mvhd is None:
+                return None
+            version = _read(f, mvhd[0], 1)[0]
+            if version == 1:
+                created = struct.unpack(">Q", _read(f, mvhd[0] + 4, 8))[0]
+            else:
+                created = struct.unpack(">I", _read(f, mvhd[0] + 4, 4))[0]
+    except (OSError, BoxError, struct.error):
+        return None
+    if created == 0:
+        return None
+    return created - QUICKTIME_EPOCH_OFFSET
+
+
+def _read_uint(f, offset, size):
+    if size == 0:
+        return 0
+    return int.from_bytes(_read(f, offset, size), "big")
+
+
+def find_heif_exif(file_path):
+    """
+    Em HEIC/HEIF o EXIF é um item dentro de meta (iinf + iloc).
+    Retorna o offset absoluto do cabeçalho TIFF desse item, ou None.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            meta = find_box(f, 0, end, b"meta")
+            if meta is None:
+                return None
+            # meta é uma FullBox: 4 bytes de versão/flags antes dos filhos
+            children = (meta[0] + 4, meta[1])
+
+            exif_id = None
+            iinf = find_box(f, *children, b"iinf")
+            if iinf is None:
+                return None
+            version = _read(f, iinf[0], 1)[0]
+            first_entry = iinf[0] + (6 if version == 0 else 8)
+            for box_type, payload, box_end in iter_boxes(f, first_entry, iinf[1]):
+                if box_type != b"infe":
+                    continue
+                infe_version = _read(f, payload, 1)[0]
+                if infe_version < 2:
+                    continue
+                id_size = 2 if infe_version == 2 else 4
+                item_id = _read_uint(f, payload + 4, id_size)
+                if _read(f, payload + 4 + id_size + 2, 4) == b"Exif":
+                    exif_id = item_id
+                    break
+            if exif_id is None:
+                return None
+
+            iloc = find_box(f, *children, b"iloc")
+            if iloc is None:
+                return None
+            pos = iloc[0]
+            version = _read(f, pos, 1)[0]
+            sizes = _read(f, pos + 4, 2)
+            offset_size, length_size = sizes[0] >> 4, sizes[0] & 0x0F
+            base_offset_size = sizes[1] >> 4
+            index_size = sizes[1] & 0x0F if version in (1, 2) else 0
+            id_size = 4 if version == 2 else 2
+            pos += 6
+            item_count = _read_uint(f, pos, id_size)
+            pos += id_size
+            for _ in range(item_count):
+                item_id = _read_uint(f, pos, id_size)
+                pos += id_size
+                if version in (1, 2):
+                    pos += 2  # construction_method
+                pos += 2  # data_reference_index
+                base_offset = _read_uint(f, pos, base_offset_size)
+                pos += base_offset_size
+                extent_count = _read_uint(f, pos, 2)
+                pos += 2
+                first_offset = None
+                for _ in range(extent_count):
+                    pos += index_size
+                    extent_offset = _read_uint(f, pos, offset_size)
+                    pos += offset_size + length_size
+                    if first_offset is None:
+                        first_offset = extent_offset
+                if item_id == exif_id and first_offset is not None:
+                    start = base_offset + first_offset
+                    # Os 4 primeiros bytes dizem onde começa o cabeçalho TIFF
+                    return start + 4 + _read_uint(f, start, 4)
+    except (OSError, BoxError, struct.error):
+        return None
+    return None
+
+
+def parse_iso6709(text):
+    """
+    "+37.5665+126.9780+010.000/" -> (37.5665, 126.978). Só o formato em graus decimais.
+    """
+    match = re.match(r"^([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)", text.strip())
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
+
+
+def _find_location(f, moov):
+    # 1. udta/©xyz (câmeras e iPhones antigos): tamanho(2) idioma(2) texto
+    xyz = find_path(f, moov[0], moov[1], (b"udta", b"\xa9xyz"))
+    if xyz is not None and xyz[1] - xyz[0] > 4:
+        location = parse_iso6709(_read(f, xyz[0] + 4, xyz[1] - xyz[0] - 4).decode("ascii", "replace"))
+        if location:
+            return location
+
+    # 2. meta com keys/ilst (iPhone): com.apple.quicktime.location.ISO6709
+    meta = find_box(f, moov[0], moov[1], b"meta")
+    if meta is None:
+        return None
+    start = meta[0]
+    # No QuickTime o meta não tem versão/flags; no ISO BMFF tem
+    if _read(f, start, 4) == bytes(4):
+        start += 4
+    keys = find_box(f, start, meta[1], b"keys")
+    ilst = find_box(f, start, meta[1], b"ilst")
+    if keys is None or ilst is None:
+        return None
+    wanted = None
+    # version/flags(4) entry_count(4), depois tamanho(4) namespace(4) nome
+    for index, (_, payload, box_end) in enumerate(iter_boxes(f, keys[0] + 8, keys[1]), 1):
+        if _read(f, payload, box_end - payload) == b"com.apple.quicktime.location.ISO6709":
+            wanted = index
+            break
+    if wanted is None:
+        return None
+    for box_type, payload, box_end in iter_boxes(f, ilst[0], ilst[1]):
+        if struct.unpack(">I", box_type)[0] != wanted:
+            continue
+        data = find_box(f, payload, box_end, b"data")
+        if data is not None and data[1] - data[0] > 8:
+            # tipo(4) locale(4) valor
+            return parse_iso6709(_read(f, data[0] + 8, data[1] - data[0] - 8).decode("ascii", "replace"))
+    return None
+
+
+def read_movie_info(file_path):
+    """
+    Metadados de catálogo de um MP4/MOV só pelos cabeçalhos: duração (mvhd),
+    codec (formato da primeira VisualSampleEntry, ex. 'avc1', 'hvc1'),
+    creation_time e localização (©xyz ou chave ISO6709 do iPhone).
+    Retorna um dict ou None se o arquivo não puder ser interpretado.
+    """
+    info = {"duration": None, "codec": None, "creation_time": None, "location": None}
+    try:
+        with open(file_path, 'rb') as f:
+            end = os.fstat(f.fileno()).st_size
+            if not _read(f, 4, 4).isalpha():
+                return None
+            moov = find_box(f, 0, end, b"moov")
+            if moov is None:
+                return None
+
+            mvhd = find_box(f, moov[0], moov[1], b"mvhd")
+            if mvhd is not None:
+                version = _read(f, mvhd[0], 1)[0]
+                if version == 1:
+                    created, _, timescale, duration = struct.unpack(">QQIQ", _read(f, mvhd[0] + 4, 28))
+                else:
+                    created, _, timescale, duration = struct.unpack(">IIII", _read(f, mvhd[0] + 4, 16))
+                if created:
+                    info["creation_time"] = created - QUICKTIME_EPOCH_OFFSET
+                if timescale:
+                    info["duration"] = duration / timescale
+
+            for box_type, payload, box_end in iter_boxes(f, moov[0], moov[1]):
+                if box_type != b"trak":
+                    continue
+                mdia = find_box(f, payload, box_end, b"mdia")
+                if mdia is None or _handler_type(f, mdia) != b"vide":
+                    continue
+                stsd = find_path(f, mdia[0], mdia[1], (b"minf", b"stbl", b"stsd"))
+                if stsd is not None and stsd[0] + 16 <= stsd[1]:
+                    info["codec"] = _read(f, stsd[0] + 12, 4).decode("ascii", "replace").strip()
+                break
+
+            info["location"] = _find_location(f, moov)
+    except (OSError, BoxError, struct.error):
+        return None
+    return info
@@ -0,0 +1,584 @@
+import os
+import sqlite3
+import struct
+import threading
+import ffmpeg
+from concurrent.futures import ThreadPoolExecutor
+
+from mover import DEFAULT_COPY_WORKERS, JOURNAL_FILENAME, PART_SUFFIX, MoveEngine
+from moveplan import FolderPlan, PlannedMove, check_move
+from mp4info import MP4_EXTS, read_video_dimensions
+from probecache import ProbeCache
+from scheduler import DeviceScheduler
+
+# Quantidade de ffprobe rodando ao mesmo tempo. Cada um é um subprocesso que
+# passa a maior parte do tempo esperando o disco, então não depende dos núcleos
+DEFAULT_PROBE_WORKERS = 8
+
+VIDEO_EXTS = ('.mov', '.mp4', '.avi', '.wmv', '.flv', '.mkv', '.webm', '.MP4', '.MOV')
+PHOTO_EXTS = ('.jpg', '.jpeg', '.heic', '.png', '.raw', '.dng', '.JPG', '.JPEG', '.HEIC')
+
+
+class FileEntry:
+    """
+    Mesmo formato de os.DirEntry (name, path, stat) para um caminho avulso.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+
+def is_ignored(filename):
+    # Arquivos de sistema do macOS (metadados) e os arquivos internos do organizador
+    return (filename.startswith("._") or filename == ".DS_Store"
+            or filename.startswith(".sepshorts-") or filename.endswith(PART_SUFFIX))
+
+
+def is_vertical(dimensions):
+    """
+    Decide se (largura, altura, rotação) é um vídeo vertical,
+    trocando largura/altura quando a rotação é 90° ou 270°.
+    """
+    if not dimensions:
+        return False
+    width, height, rotation = dimensions
+    if rotation == 90 or rotation == 270:
+        width, height = height, width
+    return height > width
+
+
+def move_reason(bucket, dims=None):
+    """
+    Explicação curta do destino, gravada no plano para revisão.
+    """
+    if bucket == "360":
+        return "nome começa com 360-"
+    if bucket == "LRF":
+        return "proxy .LRF"
+    if bucket == "Fotos":
+        return "extensão de foto"
+    if not dims:
+        return "vídeo (probe falhou)"
+    width, height, rotation = dims
+    orientation = "vertical" if bucket == "Shorts" else "horizontal"
+    if rotation:
+        return f"vídeo {orientation} {width}x{height} rotação {rotation:g}°"
+    return f"vídeo {orientation} {width}x{height}"
+
+
+def open_probe_cache(root, read_only=False):
+    """
+    Abre o cache de probes da pasta. Em mídia somente leitura (ou, com
+    `read_only`, sem cache na pasta) segue sem cache.
+    """
+    try:
+        return ProbeCache(root, read_only)
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def format_event(event):
+    """
+    Converte um evento do Organizer na mensagem de log mostrada na interface.
+    Retorna None para eventos que não aparecem no log.
+    """
+    kind = event["event"]
+    if kind == "folder_start":
+        return f"📂 INICIANDO: {os.path.basename(event['folder'])}"
+    if kind == "watching":
+        return f"👀 Observando: {os.path.basename(event['folder'])}"
+    if kind == "resume":
+        return "   ♻️ Retomando organização interrompida..."
+    if kind == "folder_error":
+        return f"❌ Erro ao acessar pasta: {event['error']}"
+    if kind == "analyzing":
+        return f"   🎥 Analisando {event['videos']} vídeos para Shorts..."
+    if kind == "moved" and event["bucket"] == "Shorts":
+        return f"     📱 Short Detectado: {os.path.basename(event['src'])}"
+    if kind == "move_error":
+        if event["bucket"] == "Shorts":
+            return f"❌ Erro ao mover Short {os.path.basename(event['src'])}: {event['error']}"
+        return f"❌ Erro ao mover {os.path.basename(event['src'])}: {event['error']}"
+    if kind == "time_corrected" and event["files"]:
+        return f"   🕒 {event['files']} datas corrigidas."
+    if kind == "time_error":
+        return f"❌ Erro ao corrigir data de {os.path.basename(event['path'])}: {event['error']}"
+    if kind == "catalog_error":
+        return f"❌ Erro ao catalogar {os.path.basename(event['path'])}: {event['error']}"
+    if kind == "thumbnails" and event["generated"]:
+        return f"   🖼️ {event['generated']} miniaturas geradas."
+    if kind == "thumb_error":
+        return f"❌ Erro ao gerar miniatura de {os.path.basename(event['path'])}: {event['error']}"
+    if kind == "duplicate":
+        action = "hard link criado" if event["linked"] else "igual a"
+        return f"     ♊ Duplicado: {os.path.basename(event['path'])} ({action} {event['original']})"
+    if kind == "dedup_error":
+        return f"❌ Erro ao verificar duplicata {os.path.basename(event['path'])}: {event['error']}"
+    if kind == "folder_done" and event["videos"]:
+        if event["shorts"] > 0:
+            return f"   ✅ {event['shorts']} Shorts movidos."
+        return "   ℹ️ Nenhum vídeo vertical encontrado."
+    return None
+
+
+# --- ENGINE (sem Qt: usado pela interface, pela CLI e por scripts) ---
+class Organizer:
+    """
+    Classifica e move os arquivos de cada pasta para 360/, LRF/, Videos/,
+    Videos/Shorts/ e Fotos/. O andamento é reportado como eventos (dicts)
+    através de `on_event`.
+    """
+
+    def __init__(self, on_event=None, max_workers=DEFAULT_PROBE_WORKERS, copy_workers=DEFAULT_COPY_WORKERS,
+                 dedup=None, dedup_link=False, prober=None, time_corrector=None, catalog=None,
+                 thumbnailer=None):
+        self.on_event = on_event
+        # prober(caminho) -> (largura, altura, rotação); trocável em benchmarks
+        self.prober = prober or self.probe_dimensions
+        # TimeCorrector opcional: corrige as datas dos arquivos movidos
+        self.time_corrector = time_corrector
+        self.max_workers = max(1, max_workers)
+        self.copy_workers = copy_workers
+        # Deduplicator opcional; com dedup_link as cópias viram hard links
+        self.dedup = dedup
+        self.dedup_link = dedup_link
+        # MediaCatalog opcional: metadados dos arquivos movidos, para consultas
+        self.catalog = catalog
+        # Thumbnailer opcional: miniaturas e folhas de contato em Thumbs/
+        self.thumbnailer = thumbnailer
+        # Pastas de discos diferentes são organizadas em threads paralelas
+        self._emit_lock = threading.RLock()
+        self._dedup_lock = threading.Lock()
+        self._catalog_lock = threading.Lock()
+
+    def emit(self, event, **data):
+        if self.on_event is not None:
+            with self._emit_lock:
+                self.on_event({"event": event, **data})
+
+    def probe_dimensions(self, file_path):
+        """
+        Retorna (largura, altura, rotação) do primeiro stream de vídeo,
+        (0, 0, 0) se não houver vídeo e None se o ffprobe falhar.
+        """
+        # MP4/MOV: lê direto do cabeçalho, sem abrir um processo ffprobe
+        if file_path.lower().endswith(MP4_EXTS):
+            dims = read_video_dimensions(file_path)
+            if dims is not None:
+                return dims
+
+        try:
+            probe = ffmpeg.probe(file_path)
+            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+            
+            if not video_stream:
+                return (0, 0, 0)
+
+            width = int(video_stream['width'])
+            height = int(video_stream['height'])
+            
+            rotation = 0
+            
+            # 1. Verifica tags padrão
+            tags = video_stream.get('tags', {})
+            if 'rotate' in tags:
+                try:
+                    rotation = float(tags['rotate'])
+                except ValueError:
+                    pass
+
+            # 2. Verifica side_data_list (iPhone/Android Modernos)
+            side_data_list = video_stream.get('side_data_list', [])
+            for side_data in side_data_list:
+                if 'rotation' in side_data:
+                    try:
+                        rotation = float(side_data['rotation'])
+                        break 
+                    except ValueError:
+                        pass
+            
+            return (width, height, abs(rotation) % 360)
+
+        except (ffmpeg.Error, KeyError, Exception):
+            return None
+
+    def is_vertical_video(self, file_path):
+        """
+        Detecta se o vídeo é vertical (Shorts/Reels/TikTok).
+        """
+        return is_vertical(self.prober(file_path))
+
+    def probe_many(self, paths, cache=None, stats=None):
+        """
+        Retorna as dimensões de cada caminho, na mesma ordem de `paths`.
+        Consulta o cache primeiro e só roda ffprobe (em paralelo) para o resto.
+        `stats` pode trazer os os.stat_result já obtidos (ex. via scandir).
+        """
+        results = [None] * len(paths)
+        miss_stats = {}
+        misses = []
+
+        for idx, path in enumerate(paths):
+            if cache is not None:
+                st = stats[idx] if stats else None
+                try:
+                    if st is None:
+                        st = os.stat(path)
+                except OSError:
+                    continue
+                dims = cache.get(path, st)
+                if dims is not None:
+                    results[idx] = dims
+                    continue
+                miss_stats[idx] = st
+            misses.append(idx)
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as pool:
+                probed = pool.map(self.prober, [paths[idx] for idx in misses])
+                for idx, dims in zip(misses, probed):
+                    results[idx] = dims
+                    if dims is not None and cache is not None:
+                        cache.put(paths[idx], dims, miss_stats[idx])
+
+        return results
+
+    def classify(self, filename):
+        """
+        Retorna a pasta de destino (360, LRF, Videos, Fotos) pelo nome do
+        arquivo, ou None se ele deve ficar onde está.
+        """
+        filename_lower = filename.lower()
+        if filename.startswith("360-"):
+            return "360"
+        if filename_lower.endswith(".lrf"):
+            return "LRF"
+        if filename_lower.endswith(VIDEO_EXTS):
+            return "Videos"
+        if filename_lower.endswith(PHOTO_EXTS):
+            return "Fotos"
+        return None
+
+    def plan_folder(self, folder, dirs, cache=None, files=None):
+        """
+        Decide o destino final de cada arquivo (inclusive Shorts) antes de
+        mexer no disco. Retorna (lista de PlannedMove, vídeos analisados).
+        Com `files` (caminhos), planeja só esses arquivos, sem listar a pasta.
+        """
+        return self.plan_entries(self.scan_folder(folder, dirs, files), dirs, cache)
+
+    def scan_folder(self, folder, dirs, files=None):
+        """
+        Lista os arquivos candidatos da pasta (e os que sobraram em Videos/).
+        """
+        entries = []
+        if files is not None:
+            for path in files:
+                entry = FileEntry(path)
+                if not is_ignored(entry.name) and os.path.isfile(path):
+                    entries.append(entry)
+            return entries
+
+        with os.scandir(folder) as it:
+            for entry in it:
+                if is_ignored(entry.name):
+                    continue
+                if entry.is_file():
+                    entries.append(entry)
+
+        # Vídeos que já estavam em Videos/ (execução anterior interrompida)
+        try:
+            with os.scandir(dirs["Videos"]) as it:
+                for entry in it:
+                    if (not entry.name.startswith("._") and entry.is_file()
+                            and entry.name.lower().endswith(VIDEO_EXTS)):
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+
+        return entries
+
+    def plan_entries(self, entries, dirs, cache=None):
+        entries = sorted(entries, key=lambda e: (e.name, e.path))
+
+        plan = []
+        videos = []
+        for entry in entries:
+            bucket = self.classify(entry.name)
+            if bucket == "Videos":
+                videos.append(entry)
+            elif bucket is not None:
+                plan.append(PlannedMove(entry.path, os.path.join(dirs[bucket], entry.name), bucket,
+                                        reason=move_reason(bucket)))
+
+        stats = []
+        for entry in videos:
+            try:
+                stats.append(entry.stat())
+            except OSError:
+                stats.append(None)
+        dimensions = self.probe_many([e.path for e in videos], cache, stats)
+
+        for entry, dims in zip(videos, dimensions):
+            bucket = "Shorts" if is_vertical(dims) else "Videos"
+            dest = os.path.join(dirs[bucket], entry.name)
+            if dest != entry.path:
+                plan.append(PlannedMove(entry.path, dest, bucket, dims, move_reason(bucket, dims)))
+
+        return plan, len(videos)
+
+    def check_duplicate(self, path):
+        """
+        Procura um arquivo idêntico no índice. Retorna True se `path` é duplicata.
+        """
+        try:
+            original = self.dedup.check(path)
+        except OSError as e:
+            self.emit("dedup_error", path=path, error=str(e))
+            return False
+        if original is None:
+            return False
+
+        linked = False
+        if self.dedup_link:
+            try:
+                self.dedup.link(original, path)
+                linked = True
+            except OSError as e:
+                self.emit("dedup_error", path=path, error=str(e))
+        self.emit("duplicate", path=path, original=original, linked=linked)
+        return True
+
+    def catalog_files(self, items, stale=()):
+        """
+        Lê os metadados de [(caminho, bucket, dims)] em paralelo (só cabeçalhos,
+        fora do lock) e grava no catálogo. `stale` são caminhos antigos que saem
+        do catálogo. Retorna quantos arquivos foram catalogados.
+        """
+        def describe(item):
+            try:
+                return self.catalog.describe(*item, prober=self.prober), None
+            except (OSError, ValueError, TypeError, struct.error) as e:
+                # Cabeçalho estranho ou truncado: pula só este arquivo
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(items)))) as pool:
+            described = list(pool.map(describe, items))
+
+        count = 0
+        with self._catalog_lock:
+            for path in stale:
+                self.catalog.delete(path)
+            for item, (row, error) in zip(items, described):
+                if error is not None:
+                    self.emit("catalog_error", path=item[0], error=str(error))
+                    continue
+                self.catalog.record(row)
+                count += 1
+            self.catalog.commit()
+        return count
+
+    def folder_dirs(self, folder):
+        return {
+            "360": os.path.join(folder, "360"),
+            "Videos": os.path.join(folder, "Videos"),
+            "Fotos": os.path.join(folder, "Fotos"),
+            "LRF": os.path.join(folder, "LRF"),
+            "Shorts": os.path.join(folder, "Videos", "Shorts"),
+        }
+
+    def prepare_folder(self, folder):
+        """
+        Cria a estrutura de pastas e conclui uma execução interrompida.
+        Retorna (pastas, MoveEngine da pasta).
+        """
+        dirs = self.folder_dirs(folder)
+        for bucket in ("360", "Videos", "Fotos", "LRF"):
+            os.makedirs(dirs[bucket], exist_ok=True)
+
+        # Execução anterior interrompida (ex. disco desconectado): termina antes
+        engine = MoveEngine(os.path.join(folder, JOURNAL_FILENAME), workers=self.copy_workers)
+        if engine.has_pending():
+            self.emit("resume", folder=folder)
+            for src, dest, error in engine.resume():
+                if error is not None:
+                    self.emit("move_error", src=src, dest=dest, bucket=None, error=str(error))
+        return dirs, engine
+
+    def organize_folder(self, folder, files=None):
+        """
+        Organiza uma pasta. Retorna o resumo (o mesmo do evento folder_done),
+        ou None se a pasta não pôde ser lida. Com `files`, trata só esses
+        arquivos (modo incremental do watcher).
+        """
+        self.emit("folder_start", folder=folder)
+
+        # 1. Criar estrutura de pastas
+        dirs, engine = self.prepare_folder(folder)
+
+        # 2. Planejar: uma passada de scandir + probes (cache e pool)
+        cache = open_probe_cache(folder)
+        try:
+            plan, video_count = self.plan_folder(folder, dirs, cache, files)
+        except Exception as e:
+            self.emit("folder_error", folder=folder, error=str(e))
+            return None
+        finally:
+            if cache is not None:
+                cache.close()
+
+        if video_count:
+            self.emit("analyzing", folder=folder, videos=video_count)
+            os.makedirs(dirs["Shorts"], exist_ok=True)
+        return self.apply_moves(folder, plan, video_count, engine)
+
+    def plan_only(self, folder):
+        """
+        Planeja a pasta sem criar pastas nem mover nada (modo plan/apply).
+        Cada movimento sai como evento "planned". Retorna FolderPlan ou None.
+        """
+        self.emit("folder_start", folder=folder)
+        # Só leitura: o plano não pode escrever na pasta que diz não tocar
+        cache = open_probe_cache(folder, read_only=True)
+        try:
+            plan, video_count = self.plan_folder(folder, self.folder_dirs(folder), cache)
+        except Exception as e:
+            self.emit("folder_error", folder=folder, error=str(e))
+            return None
+        finally:
+            if cache is not None:
+                cache.close()
+
+        for move in plan:
+            try:
+                st = os.stat(move.src)
+                move.size, move.mtime_ns = st.st_size, st.st_mtime_ns
+            except OSError:
+                pass
+            self.emit("planned", src=move.src, dest=move.dest, bucket=move.bucket, reason=move.reason)
+        self.emit("plan_done", folder=folder, videos=video_count, moves=len(plan))
+        return FolderPlan(folder, plan, video_count)
+
+    def apply_plan(self, folder_plan):
+        """
+        Aplica um plano gravado. Arquivos que mudaram ou sumiram desde o
+        plano não são tocados (evento plan_stale e conta como erro); os que já
+        estão no destino são ignorados. Retorna o resumo, como organize_folder.
+        """
+        folder = folder_plan.folder
+        self.emit("folder_start", folder=folder)
+        if not os.path.isdir(folder):
+            self.emit("folder_error", folder=folder, error="Pasta não encontrada")
+            return None
+        _, engine = self.prepare_folder(folder)
+
+        moves, stale = [], 0
+        for move in folder_plan.moves:
+            problem = check_move(move)
+            if problem is None:
+                moves.append(move)
+            elif problem != "done":
+                stale += 1
+                self.emit("plan_stale", src=move.src, dest=move.dest, bucket=move.bucket, error=problem)
+
+        summary = self.apply_moves(folder, moves, folder_plan.videos, engine)
+        summary["errors"] += stale
+        return summary
+
+    def apply_moves(self, folder, plan, video_count, engine):
+        """
+        Move os arquivos do plano e faz as etapas seguintes (datas, catálogo,
+        duplicatas). Emite folder_done e retorna o resumo.
+        """
+        for path in sorted({os.path.dirname(move.dest) for move in plan}):
+            os.makedirs(path, exist_ok=True)
+
+        # 3. Aplicar: cada arquivo é movido uma única vez
+        results = engine.run([(move.src, move.dest) for move in plan])
+        summary = {"folder": folder, "videos": video_count, "moved": 0, "shorts": 0, "errors": 0, "duplicates": 0}
+        for move, error in zip(plan, results):
+            if error is not None:
+                summary["errors"] += 1
+                self.emit("move_error", src=move.src, dest=move.dest, bucket=move.bucket, error=str(error))
+                continue
+            summary["moved"] += 1
+            if move.bucket == "Shorts":
+                summary["shorts"] += 1
+            self.emit("moved", src=move.src, dest=move.dest, bucket=move.bucket)
+
+        # 4. Datas (perfil de offset por dispositivo), antes do dedup que usa o mtime
+        if self.time_corrector is not None:
+            moved = [move.dest for move, error in zip(plan, results) if error is None]
+            try:
+                corrections, errors = self.time_corrector.correct(moved)
+            except Exception as e:
+                # Os arquivos já foram movidos: o resto da pasta não pode parar aqui
+                corrections, errors = [], [(folder, e)]
+            for path, error in errors:
+                self.emit("time_error", path=path, error=str(error))
+            failed = {path for path, _ in errors}
+            self.emit("time_corrected", folder=folder, files=sum(c.path not in failed for c in corrections))
+
+        # 5. Catálogo, depois das datas corrigidas
+        if self.catalog is not None:
+            done = [move for move, error in zip(plan, results) if error is None]
+            count = self.catalog_files([(move.dest, move.bucket, move.dims) for move in done],
+                                       stale=[move.src for move in done])
+            self.emit("cataloged", folder=folder, files=count)
+
+        # 6. Miniaturas (do proxy LRF quando existe), só do que mudou
+        if self.thumbnailer is not None and summary["moved"]:
+            result = self.thumbnailer.run(folder)
+            for clip, error in result["errors"]:
+                self.emit("thumb_error", path=os.path.join(folder, clip), error=error)
+            self.emit("thumbnails", folder=folder, generated=result["generated"], cached=result["cached"])
+
+        # 7. Duplicatas (índice de hashes compartilhado entre execuções)
+        if self.dedup is not None:
+            with self._dedup_lock:
+                for move, error in zip(plan, results):
+                    if error is None and self.check_duplicate(move.dest):
+                        summary["duplicates"] += 1
+                self.dedup.index.commit()
+
+        self.emit("folder_done", **summary)
+        return summary
+
+    def _schedule(self, folders, work):
+        total_folders = len(folders)
+        completed = [0]
+
+        def on_done(idx, result):
+            completed[0] += 1
+            self.emit("progress", percent=int((completed[0] / total_folders) * 100))
+
+        def on_error(idx, error):
+            self.emit("folder_error", folder=folders[idx], error=str(error))
+
+        return DeviceScheduler().run(folders, work, on_done, on_error)
+
+    def run(self, folders):
+        """
+        Organiza todas as pastas: em sequência dentro do mesmo disco e em
+        paralelo entre discos diferentes. Retorna a lista de resumos na ordem
+        de `folders` (None para pastas que falharam).
+        """
+        return self._schedule(folders, self.organize_folder)
+
+    def plan(self, folders):
+        """
+        Só planeja (probes em paralelo, nada é movido). Retorna a lista de
+        FolderPlan na ordem de `folders` (None para pastas que falharam).
+        """
+        return self._schedule(folders, self.plan_only)
+
+    def apply(self, plans):
+        """
+        Aplica uma lista de FolderPlan, com o mesmo agendamento por disco do run.
+        """
+        by_folder = {plan.folder: plan for plan in plans}
+        return self._schedule([plan.folder for plan in plans], lambda folder: self.apply_plan(by_folder[folder]))
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+from urllib.parse import quote
+
+CACHE_FILENAME = ".sepshorts-probe.sqlite"
+
+
+class ProbeCache:
+    """
+    Cache em disco (SQLite) com a largura, altura e rotação de cada vídeo.
+    A chave é (inode, tamanho, mtime), então o resultado continua válido depois
+    que o arquivo é movido dentro do mesmo disco (Videos/ -> Videos/Shorts).
+    Com `read_only` só consulta (o modo plan não escreve na pasta): o arquivo
+    tem que existir, e put/atualização de caminho não fazem nada.
+    """
+
+    def __init__(self, root, read_only=False):
+        self.path = os.path.join(root, CACHE_FILENAME)
+        self.read_only = read_only
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True)
+            return
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS probes (
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                rotation REAL NOT NULL,
+                PRIMARY KEY (inode, size, mtime_ns)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS probes_path ON probes (path)")
+
+    @staticmethod
+    def _key(st):
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def get(self, file_path, st=None):
+        """
+        Retorna (width, height, rotation) ou None se não houver entrada válida.
+        """
+        if st is None:
+            st = os.stat(file_path)
+        row = self.conn.execute(
+            "SELECT path, width, height, rotation FROM probes "
+            "WHERE inode = ? AND size = ? AND mtime_ns = ?",
+            self._key(st),
+        ).fetchone()
+        if row is None:
+            return None
+
+        cached_path, width, height, rotation = row
+        if cached_path != file_path and not self.read_only:
+            # Mesmo arquivo, só mudou de lugar
+            self.conn.execute(
+                "UPDATE probes SET path = ? WHERE inode = ? AND size = ? AND mtime_ns = ?",
+                (file_path, *self._key(st)),
+            )
+        return width, height, rotation
+
+    def put(self, file_path, dimensions, st=None):
+        if self.read_only:
+            return
+        if st is None:
+            st = os.stat(file_path)
+        width, height, rotation = dimensions
+        # Qualquer entrada antiga para este caminho ficou obsoleta
+        self.conn.execute("DELETE FROM probes WHERE path = ?", (file_path,))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*self._key(st), file_path, width, height, rotation),
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
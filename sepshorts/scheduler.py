@@ -0,0 +1,82 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def physical_device(path):
+    """
+    Identifica o disco físico de uma pasta. No Linux resolve o st_dev em
+    /sys/dev/block e sobe da partição para o disco (sda1 -> sda), então duas
+    partições do mesmo HD caem na mesma fila. Nos outros sistemas usa o st_dev.
+    """
+    dev = os.stat(path).st_dev
+    sys_path = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+    if os.path.exists(sys_path):
+        real = os.path.realpath(sys_path)
+        if os.path.exists(os.path.join(real, "partition")):
+            real = os.path.dirname(real)
+        return real
+    return dev
+
+
+def group_by_device(folders):
+    """
+    Agrupa as pastas por disco, mantendo a ordem original dentro de cada grupo.
+    Retorna uma lista de listas de índices em `folders`.
+    """
+    groups = {}
+    for idx, folder in enumerate(folders):
+        try:
+            key = physical_device(folder)
+        except OSError:
+            # Pasta inacessível: fila própria, o erro aparece ao organizar
+            key = ("erro", idx)
+        groups.setdefault(key, []).append(idx)
+    return list(groups.values())
+
+
+class DeviceScheduler:
+    """
+    Uma fila sequencial por disco físico; discos diferentes rodam em paralelo.
+    Assim um HD ou leitor de SD nunca tem duas pastas disputando a cabeça de
+    leitura, e o total escala com o número de discos conectados.
+    """
+
+    def __init__(self, max_devices=None):
+        self.max_devices = max_devices
+
+    def run(self, folders, work, on_done=None, on_error=None):
+        """
+        Executa work(folder) para cada pasta. on_done(idx, resultado) é chamado
+        (com lock) ao fim de cada uma. Um erro numa pasta não para a fila do
+        disco: vai para on_error(idx, erro) e o resultado dela fica None.
+        Retorna os resultados na ordem de `folders`.
+        """
+        results = [None] * len(folders)
+        groups = group_by_device(folders)
+        lock = threading.Lock()
+
+        def run_queue(indices):
+            for idx in indices:
+                try:
+                    result = work(folders[idx])
+                except Exception as e:
+                    result = None
+                    if on_error is not None:
+                        with lock:
+                            on_error(idx, e)
+                with lock:
+                    results[idx] = result
+                    if on_done is not None:
+                        on_done(idx, result)
+
+        if len(groups) <= 1:
+            for indices in groups:
+                run_queue(indices)
+            return results
+
+        workers = min(len(groups), self.max_devices or len(groups))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(run_queue, indices) for indices in groups]:
+                future.result()
+        return results
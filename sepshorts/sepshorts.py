@@ -1,161 +1,62 @@
 import sys
 import os
-import shutil
-import ffmpeg
+import threading
+from collections import deque
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QLabel, QFileDialog, QProgressBar, QTextEdit, 
+                             QLabel, QFileDialog, QProgressBar, QPlainTextEdit, 
                              QMessageBox, QFrame)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QDragEnterEvent, QDropEvent, QPalette, QColor
 
+from catalog import open_catalog
+from mover import DEFAULT_COPY_WORKERS
+from organizer import DEFAULT_PROBE_WORKERS, Organizer, format_event
+
+# O log é despejado em lotes pela interface, no máximo a cada LOG_FLUSH_INTERVAL_MS,
+# e só as últimas LOG_MAX_LINES linhas ficam na tela (e no buffer do worker)
+LOG_FLUSH_INTERVAL_MS = 150
+LOG_MAX_LINES = 2000
+
 # --- WORKER THREAD (Lógica de Processamento) ---
 class OrganizerWorker(QThread):
     progress_signal = pyqtSignal(int)
-    log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal()
 
-    def __init__(self, folders):
+    def __init__(self, folders, max_workers=DEFAULT_PROBE_WORKERS, copy_workers=DEFAULT_COPY_WORKERS):
         super().__init__()
         self.folders = folders
-
-    def is_vertical_video(self, file_path):
+        self.organizer = Organizer(self.handle_event, max_workers, copy_workers)
+        self._log_buffer = deque(maxlen=LOG_MAX_LINES)
+        self._log_lock = threading.Lock()
+
+    def handle_event(self, event):
+        if event["event"] == "progress":
+            self.progress_signal.emit(event["percent"])
+            return
+        message = format_event(event)
+        if message:
+            with self._log_lock:
+                self._log_buffer.append(message)
+
+    def take_logs(self):
         """
-        Detecta se o vídeo é vertical (Shorts/Reels/TikTok).
+        Retorna e esvazia as mensagens acumuladas (chamado pelo timer da interface).
         """
-        try:
-            probe = ffmpeg.probe(file_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            
-            if not video_stream:
-                return False
-
-            width = int(video_stream['width'])
-            height = int(video_stream['height'])
-            
-            rotation = 0
-            
-            # 1. Verifica tags padrão
-            tags = video_stream.get('tags', {})
-            if 'rotate' in tags:
-                try:
-                    rotation = float(tags['rotate'])
-                except ValueError:
-                    pass
-
-            # 2. Verifica side_data_list (iPhone/Android Modernos)
-            side_data_list = video_stream.get('side_data_list', [])
-            for side_data in side_data_list:
-                if 'rotation' in side_data:
-                    try:
-                        rotation = float(side_data['rotation'])
-                        break 
-                    except ValueError:
-                        pass
-            
-            rotation = abs(rotation) % 360
-
-            if rotation == 90 or rotation == 270:
-                width, height = height, width
-
-            return height > width
-
-        except (ffmpeg.Error, KeyError, Exception):
-            return False
+        with self._log_lock:
+            messages = list(self._log_buffer)
+            self._log_buffer.clear()
+        return messages
 
     def run(self):
-        total_folders = len(self.folders)
-        
-        video_exts = ('.mov', '.mp4', '.avi', '.wmv', '.flv', '.mkv', '.webm', '.MP4', '.MOV')
-        photo_exts = ('.jpg', '.jpeg', '.heic', '.png', '.raw', '.dng', '.JPG', '.JPEG', '.HEIC')
-
-        for i, folder in enumerate(self.folders):
-            folder_name = os.path.basename(folder)
-            self.log_signal.emit(f"📂 INICIANDO: {folder_name}")
-
-            # 1. Criar estrutura de pastas
-            dirs = {
-                "360": os.path.join(folder, "360"),
-                "Videos": os.path.join(folder, "Videos"),
-                "Fotos": os.path.join(folder, "Fotos"),
-                "LRF": os.path.join(folder, "LRF")
-            }
-            
-            for path in dirs.values():
-                os.makedirs(path, exist_ok=True)
-
-            try:
-                files = [f for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f))]
-            except Exception as e:
-                self.log_signal.emit(f"❌ Erro ao acessar pasta: {e}")
-                continue
-
-            for file in files:
-                # --- CORREÇÃO AQUI ---
-                # Ignora arquivos de sistema do macOS (metadados)
-                if file.startswith("._") or file == ".DS_Store":
-                    continue
-                # ---------------------
-
-                file_path = os.path.join(folder, file)
-                filename_lower = file.lower()
-
-                try:
-                    dest = None
-                    if file.startswith("360-"):
-                        dest = dirs["360"]
-                    elif filename_lower.endswith(".lrf"):
-                        dest = dirs["LRF"]
-                    elif filename_lower.endswith(video_exts):
-                        dest = dirs["Videos"]
-                    elif filename_lower.endswith(photo_exts):
-                        dest = dirs["Fotos"]
-                    
-                    if dest:
-                        shutil.move(file_path, os.path.join(dest, file))
-                        
-                except Exception as e:
-                    self.log_signal.emit(f"❌ Erro ao mover {file}: {str(e)}")
-
-            # 3. Processar Shorts
-            videos_path = dirs["Videos"]
-            shorts_path = os.path.join(videos_path, "Shorts")
-            
-            try:
-                video_files = [f for f in os.listdir(videos_path) if os.path.isfile(os.path.join(videos_path, f))]
-            except FileNotFoundError:
-                video_files = []
-
-            if video_files:
-                self.log_signal.emit(f"   🎥 Analisando {len(video_files)} vídeos para Shorts...")
-                
-                if not os.path.exists(shorts_path):
-                    os.makedirs(shorts_path)
-
-                count_shorts = 0
-                for vid in video_files:
-                    # Ignora arquivos ocultos aqui também por segurança
-                    if vid.startswith("._"): continue
-
-                    if vid.lower().endswith(video_exts):
-                        vid_path = os.path.join(videos_path, vid)
-                        
-                        if self.is_vertical_video(vid_path):
-                            try:
-                                shutil.move(vid_path, os.path.join(shorts_path, vid))
-                                count_shorts += 1
-                                self.log_signal.emit(f"     📱 Short Detectado: {vid}")
-                            except Exception as e:
-                                self.log_signal.emit(f"❌ Erro ao mover Short {vid}: {e}")
-                
-                if count_shorts > 0:
-                    self.log_signal.emit(f"   ✅ {count_shorts} Shorts movidos.")
-                else:
-                    self.log_signal.emit("   ℹ️ Nenhum vídeo vertical encontrado.")
-
-            progress = int(((i + 1) / total_folders) * 100)
-            self.progress_signal.emit(progress)
-
-        self.finished_signal.emit()
+        # O catálogo padrão (~/.cache/sepshorts/catalog.sqlite) é gravado a cada organização
+        try:
+            self.organizer.catalog = open_catalog()
+            self.organizer.run(self.folders)
+        finally:
+            # Mesmo com erro a janela tem que sair do estado "organizando"
+            if self.organizer.catalog is not None:
+                self.organizer.catalog.close()
+            self.finished_signal.emit()
 
 
 # --- INTERFACE GRÁFICA (Mantida idêntica à versão moderna) ---
@@ -206,12 +107,18 @@ class ModernWindow(QMainWindow):
         self.progress_bar.setValue(0)
         main_layout.addWidget(self.progress_bar)
 
-        self.log_box = QTextEdit()
+        self.log_box = QPlainTextEdit()
         self.log_box.setReadOnly(True)
+        self.log_box.setMaximumBlockCount(LOG_MAX_LINES)
         self.log_box.setPlaceholderText("> Aguardando pastas...")
         self.log_box.setFixedHeight(160)
         main_layout.addWidget(self.log_box)
 
+        self.worker = None
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_timer.timeout.connect(self.flush_log)
+
     def dragEnterEvent(self, event: QDragEnterEvent):
         if event.mimeData().hasUrls():
             event.accept()
@@ -241,7 +148,7 @@ class ModernWindow(QMainWindow):
         if folders:
             self.start_processing(folders)
         else:
-            self.log_box.append("> ⚠️ Por favor, arraste apenas pastas.")
+            self.log_box.appendPlainText("> ⚠️ Por favor, arraste apenas pastas.")
 
     def open_folder_dialog(self, event):
         folder = QFileDialog.getExistingDirectory(self, "Selecione uma Pasta")
@@ -251,25 +158,33 @@ class ModernWindow(QMainWindow):
     def start_processing(self, folders):
         self.drop_frame.setEnabled(False)
         self.log_box.clear()
-        self.log_box.append(f"> 🚀 Iniciando organização em {len(folders)} pasta(s)...")
+        self.log_box.appendPlainText(f"> 🚀 Iniciando organização em {len(folders)} pasta(s)...")
         self.progress_bar.setValue(0)
 
         self.worker = OrganizerWorker(folders)
-        self.worker.log_signal.connect(self.update_log)
         self.worker.progress_signal.connect(self.progress_bar.setValue)
         self.worker.finished_signal.connect(self.process_finished)
         self.worker.start()
-
-    def update_log(self, message):
-        self.log_box.append(f"> {message}")
+        self.log_timer.start()
+
+    def flush_log(self):
+        if self.worker is None:
+            return
+        messages = self.worker.take_logs()
+        if not messages:
+            return
+        # Um único append e um único scroll por lote
+        self.log_box.appendPlainText("\n".join(f"> {message}" for message in messages[-LOG_MAX_LINES:]))
         sb = self.log_box.verticalScrollBar()
         sb.setValue(sb.maximum())
 
     def process_finished(self):
+        self.log_timer.stop()
+        self.flush_log()
         self.drop_frame.setEnabled(True)
         self.progress_bar.setValue(100)
         QMessageBox.information(self, "Concluído", "Organização finalizada com sucesso!")
-        self.log_box.append("> ✅ Processo finalizado.")
+        self.log_box.appendPlainText("> ✅ Processo finalizado.")
 
 def apply_modern_style(app):
     font = QFont()
@@ -312,7 +227,7 @@ def apply_modern_style(app):
         border-radius: 4px;
     }
 
-    QTextEdit {
+    QPlainTextEdit {
         border: 1px solid #444;
         border-radius: 10px;
         background-color: #121212;
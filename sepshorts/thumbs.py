@@ -0,0 +1,180 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import ffmpeg
+
+from mover import PART_SUFFIX
+from mp4info import MP4_EXTS, read_movie_info
+from organizer import VIDEO_EXTS, is_ignored
+
+THUMBS_DIRNAME = "Thumbs"
+MANIFEST_FILENAME = ".sepshorts-thumbs.json"
+
+DEFAULT_COLS = 4
+DEFAULT_ROWS = 4
+DEFAULT_WIDTH = 320
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Pastas do organizador que recebem miniaturas
+CLIP_DIRS = ("Videos", os.path.join("Videos", "Shorts"), "360")
+
+
+def media_duration(path):
+    """
+    Duração em segundos: pelo cabeçalho em MP4/MOV/LRF, senão pelo ffprobe.
+    """
+    if path.lower().endswith(MP4_EXTS + ('.lrf',)):
+        info = read_movie_info(path)
+        if info and info["duration"]:
+            return info["duration"]
+    try:
+        return float(ffmpeg.probe(path)['format']['duration'])
+    except (ffmpeg.Error, KeyError, ValueError, Exception):
+        return None
+
+
+def _keyframe_at(source, seconds, width, height):
+    # -ss antes do -i com noaccurate_seek pega o keyframe anterior ao instante;
+    # skip_frame=nokey faz o decoder ignorar todo o resto
+    return (ffmpeg.input(source, ss=f"{seconds:.3f}", noaccurate_seek=None, skip_frame="nokey", threads=1)
+            .video.filter("setpts", "PTS-STARTPTS").filter("trim", end_frame=1)
+            .filter("scale", width, height, force_original_aspect_ratio="decrease")
+            .filter("pad", width, height, "(ow-iw)/2", "(oh-ih)/2")
+            .filter("setsar", 1))
+
+
+def _write_jpeg(stream, dest):
+    tmp = dest + PART_SUFFIX
+    stream.output(tmp, format="image2", vcodec="mjpeg", vframes=1, **{"q:v": 3}).run(
+        quiet=True, overwrite_output=True)
+    os.replace(tmp, dest)
+
+
+def render_clip(job):
+    """
+    Gera a miniatura e a folha de contato de um clipe. Roda num processo do
+    pool; recebe e retorna só tipos simples. Retorna (clipe, erro ou None).
+    """
+    source, cols, rows, width = job["source"], job["cols"], job["rows"], job["width"]
+    height = width * 9 // 16 // 2 * 2
+    try:
+        duration = media_duration(source)
+        if not duration:
+            raise ValueError("duração desconhecida")
+
+        _write_jpeg(_keyframe_at(source, duration * 0.1, width, height), job["thumb"])
+
+        count = cols * rows
+        frames = [_keyframe_at(source, duration * (i + 0.5) / count, width, height) for i in range(count)]
+        sheet = ffmpeg.concat(*frames, n=count, v=1, a=0).filter("tile", f"{cols}x{rows}")
+        _write_jpeg(sheet, job["sheet"])
+    except ffmpeg.Error as e:
+        stderr = (e.stderr or b"").decode("utf-8", "replace").strip().splitlines()
+        return job["clip"], stderr[-1] if stderr else str(e)
+    except (OSError, ValueError) as e:
+        return job["clip"], str(e)
+    return job["clip"], None
+
+
+class Thumbnailer:
+    """
+    Miniatura + folha de contato de cada clipe de uma pasta organizada, em
+    Thumbs/. Usa o proxy LRF/ quando existe (mesmo nome do clipe), decodifica
+    só keyframes e roda um ffmpeg por processo do pool. O manifesto em
+    Thumbs/ guarda tamanho/mtime da fonte e os parâmetros: rodar de novo só
+    gera o que mudou.
+    """
+
+    def __init__(self, cols=DEFAULT_COLS, rows=DEFAULT_ROWS, width=DEFAULT_WIDTH,
+                 workers=DEFAULT_WORKERS, force=False):
+        self.cols = cols
+        self.rows = rows
+        self.width = width
+        self.workers = max(1, workers)
+        self.force = force
+
+    @staticmethod
+    def proxies(folder):
+        """
+        {nome sem extensão (minúsculo): caminho do .LRF} da pasta LRF/.
+        """
+        found = {}
+        try:
+            with os.scandir(os.path.join(folder, "LRF")) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(".lrf") and not entry.name.startswith("._"):
+                        found[os.path.splitext(entry.name)[0].lower()] = entry.path
+        except FileNotFoundError:
+            pass
+        return found
+
+    @staticmethod
+    def clips(folder):
+        for sub in CLIP_DIRS:
+            try:
+                with os.scandir(os.path.join(folder, sub)) as it:
+                    entries = sorted((e for e in it if e.is_file()), key=lambda e: e.name)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not is_ignored(entry.name) and entry.name.lower().endswith(VIDEO_EXTS):
+                    yield os.path.join(sub, entry.name), entry.path
+
+    def _load_manifest(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, path, manifest):
+        tmp = path + PART_SUFFIX
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+
+    def run(self, folder):
+        """
+        Gera o que falta. Retorna {"generated": n, "cached": n, "errors": [(clipe, erro)]}.
+        """
+        out_dir = os.path.join(folder, THUMBS_DIRNAME)
+        os.makedirs(out_dir, exist_ok=True)
+        manifest_path = os.path.join(out_dir, MANIFEST_FILENAME)
+        manifest = self._load_manifest(manifest_path)
+        proxies = self.proxies(folder)
+
+        jobs, keys, cached, errors = [], {}, 0, []
+        for clip, path in self.clips(folder):
+            source = proxies.get(os.path.splitext(os.path.basename(clip))[0].lower(), path)
+            try:
+                st = os.stat(source)
+            except OSError as e:
+                # Clipe ou proxy sumiu depois da listagem: os outros seguem
+                errors.append((clip, str(e)))
+                continue
+            key = {"source": os.path.relpath(source, folder), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                   "cols": self.cols, "rows": self.rows, "width": self.width}
+            base = os.path.basename(clip)
+            thumb = os.path.join(out_dir, base + ".jpg")
+            sheet = os.path.join(out_dir, base + ".sheet.jpg")
+            if (not self.force and manifest.get(clip) == key
+                    and os.path.exists(thumb) and os.path.exists(sheet)):
+                cached += 1
+                continue
+            keys[clip] = key
+            jobs.append({"clip": clip, "source": source, "thumb": thumb, "sheet": sheet,
+                         "cols": self.cols, "rows": self.rows, "width": self.width})
+
+        if jobs:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                for clip, error in pool.map(render_clip, jobs):
+                    if error is None:
+                        manifest[clip] = keys[clip]
+                    else:
+                        manifest.pop(clip, None)
+                        errors.append((clip, error))
+            self._save_manifest(manifest_path, manifest)
+
+        failed = {clip for clip, _ in errors}
+        return {"generated": sum(clip not in failed for clip in keys), "cached": cached, "errors": errors}
@@ -0,0 +1,412 @@
+import fnmatch
+import json
+import os
+import re
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from mp4info import MP4_EXTS, find_heif_exif, read_creation_time
+
+JPEG_EXTS = ('.jpg', '.jpeg')
+TIFF_EXTS = ('.dng', '.tif', '.tiff')
+HEIF_EXTS = ('.heic', '.heif')
+
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+TAG_GPS_IFD = 0x8825
+TAG_PIXEL_X = 0xA002
+TAG_PIXEL_Y = 0xA003
+
+DEFAULT_WORKERS = 8
+
+# Separadores equivalentes nos nomes de arquivo e nos padrões dos perfis
+SEPARATORS = re.compile(r"[-_ .]+")
+
+
+# --- Leitura da data de captura direto dos cabeçalhos ---
+def _read_ifd(f, base, offset, endian):
+    """
+    Lê uma IFD do TIFF e retorna {tag: (tipo, count, valor_ou_offset_bruto)}.
+    """
+    f.seek(base + offset)
+    raw = f.read(2)
+    if len(raw) < 2:
+        return {}
+    count = struct.unpack(endian + "H", raw)[0]
+    data = f.read(count * 12)
+    entries = {}
+    for i in range(len(data) // 12):
+        tag, typ, n = struct.unpack_from(endian + "HHI", data, i * 12)
+        entries[tag] = (typ, n, data[i * 12 + 8:i * 12 + 12])
+    return entries
+
+
+def _ifd_ascii(f, base, entry, endian):
+    typ, n, raw = entry
+    if typ != 2:
+        return None
+    if n <= 4:
+        value = raw[:n]
+    else:
+        f.seek(base + struct.unpack(endian + "I", raw)[0])
+        value = f.read(n)
+    return value.split(b"\0", 1)[0].decode("ascii", "replace").strip()
+
+
+def _tiff_endian(f, base):
+    f.seek(base)
+    header = f.read(8)
+    if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+        return None, None
+    endian = "<" if header[:2] == b"II" else ">"
+    return endian, struct.unpack(endian + "I", header[4:8])[0]
+
+
+def read_tiff_datetime(f, base):
+    """
+    Lê DateTimeOriginal (ou DateTime) de um bloco TIFF/EXIF que começa em
+    `base`. Retorna timestamp Unix ou None. Sem OffsetTimeOriginal, a data é
+    interpretada no fuso local (como fazia o `touch` do tmzcorrect.sh).
+    """
+    endian, ifd0_offset = _tiff_endian(f, base)
+    if endian is None:
+        return None
+    ifd0 = _read_ifd(f, base, ifd0_offset, endian)
+
+    text, offset_text = None, None
+    if TAG_EXIF_IFD in ifd0:
+        exif_offset = struct.unpack(endian + "I", ifd0[TAG_EXIF_IFD][2])[0]
+        exif = _read_ifd(f, base, exif_offset, endian)
+        if TAG_DATETIME_ORIGINAL in exif:
+            text = _ifd_ascii(f, base, exif[TAG_DATETIME_ORIGINAL], endian)
+        if TAG_OFFSET_TIME_ORIGINAL in exif:
+            offset_text = _ifd_ascii(f, base, exif[TAG_OFFSET_TIME_ORIGINAL], endian)
+    if not text and TAG_DATETIME in ifd0:
+        text = _ifd_ascii(f, base, ifd0[TAG_DATETIME], endian)
+    if not text:
+        return None
+
+    try:
+        if offset_text:
+            return datetime.strptime(text + offset_text, "%Y:%m:%d %H:%M:%S%z").timestamp()
+        return datetime.strptime(text, "%Y:%m:%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+def _jpeg_exif_base(f):
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        marker = f.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            return None
+        kind, length = marker[1], struct.unpack(">H", marker[2:])[0]
+        # SOS: a partir daqui só vem imagem
+        if kind == 0xDA:
+            return None
+        start = f.tell()
+        if kind == 0xE1 and f.read(6) == b"Exif\0\0":
+            return start + 6
+        f.seek(start + length - 2)
+
+
+def _tiff_base(f, file_path):
+    """
+    Offset do cabeçalho TIFF (EXIF) dentro do arquivo, ou None.
+    """
+    lower = file_path.lower()
+    if lower.endswith(JPEG_EXTS):
+        return _jpeg_exif_base(f)
+    if lower.endswith(TIFF_EXTS):
+        return 0
+    if lower.endswith(HEIF_EXTS):
+        base = find_heif_exif(file_path)
+        # Alguns encoders incluem o prefixo "Exif\0\0" no item
+        if base is not None:
+            f.seek(base)
+            if f.read(6) == b"Exif\0\0":
+                base += 6
+        return base
+    return None
+
+
+def _ifd_uint(entry, endian):
+    typ, _, raw = entry
+    if typ == 3:
+        return struct.unpack(endian + "H", raw[:2])[0]
+    if typ == 4:
+        return struct.unpack(endian + "I", raw)[0]
+    return None
+
+
+def _gps_degrees(f, base, entry, endian):
+    typ, n, raw = entry
+    if typ != 5 or n != 3:
+        return None
+    f.seek(base + struct.unpack(endian + "I", raw)[0])
+    values = struct.unpack(endian + "6I", f.read(24))
+    if not (values[1] and values[3] and values[5]):
+        return None
+    return values[0] / values[1] + values[2] / values[3] / 60 + values[4] / values[5] / 3600
+
+
+def read_tiff_extras(f, base):
+    """
+    Localização e tamanho do bloco TIFF/EXIF: {"location": (lat, lon) ou
+    None, "width": ..., "height": ...}.
+    """
+    extras = {"location": None, "width": None, "height": None}
+    endian, ifd0_offset = _tiff_endian(f, base)
+    if endian is None:
+        return extras
+    ifd0 = _read_ifd(f, base, ifd0_offset, endian)
+
+    if TAG_EXIF_IFD in ifd0:
+        # Ponteiro cru (LONG ou IFD, tipo 13): alguns DNG gravam o sub-IFD como tipo 13
+        exif = _read_ifd(f, base, struct.unpack(endian + "I", ifd0[TAG_EXIF_IFD][2])[0], endian)
+        if TAG_PIXEL_X in exif and TAG_PIXEL_Y in exif:
+            extras["width"] = _ifd_uint(exif[TAG_PIXEL_X], endian)
+            extras["height"] = _ifd_uint(exif[TAG_PIXEL_Y], endian)
+
+    if TAG_GPS_IFD in ifd0:
+        gps = _read_ifd(f, base, struct.unpack(endian + "I", ifd0[TAG_GPS_IFD][2])[0], endian)
+        if all(tag in gps for tag in (1, 2, 3, 4)):
+            lat = _gps_degrees(f, base, gps[2], endian)
+            lon = _gps_degrees(f, base, gps[4], endian)
+            if lat is not None and lon is not None:
+                if _ifd_ascii(f, base, gps[1], endian) == "S":
+                    lat = -lat
+                if _ifd_ascii(f, base, gps[3], endian) == "W":
+                    lon = -lon
+                extras["location"] = (lat, lon)
+    return extras
+
+
+def read_capture_time(file_path):
+    """
+    Retorna (timestamp, origem) da data de captura embutida no arquivo:
+    EXIF DateTimeOriginal em JPEG/DNG/HEIC ou creation_time do mvhd em
+    MP4/MOV. (None, None) quando não há data embutida.
+    """
+    try:
+        if file_path.lower().endswith(MP4_EXTS):
+            ts = read_creation_time(file_path)
+            return (ts, "mvhd") if ts is not None else (None, None)
+
+        with open(file_path, 'rb') as f:
+            base = _tiff_base(f, file_path)
+            if base is not None:
+                ts = read_tiff_datetime(f, base)
+                if ts is not None:
+                    return ts, "exif"
+    except (OSError, struct.error):
+        pass
+    return None, None
+
+
+def read_photo_info(file_path):
+    """
+    Data de captura, localização GPS e tamanho do EXIF de uma foto, numa
+    leitura só. Retorna None se a foto não tiver EXIF legível.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            base = _tiff_base(f, file_path)
+            if base is None:
+                return None
+            info = read_tiff_extras(f, base)
+            info["capture_time"] = read_tiff_datetime(f, base)
+            return info
+    except (OSError, struct.error):
+        return None
+
+
+def reference_time(file_path, use_embedded=True):
+    """
+    Data usada como base pelas correções: a de captura embutida quando existe,
+    senão a menor entre criação e modificação do arquivo (como o
+    tmzcorrect.sh fazia). Retorna (timestamp, origem).
+    """
+    if use_embedded:
+        ts, source = read_capture_time(file_path)
+        if ts is not None:
+            return ts, source
+    st = os.stat(file_path)
+    return min(getattr(st, "st_birthtime", st.st_mtime), st.st_mtime), "file"
+
+
+# --- Perfis de offset por padrão de nome ---
+class OffsetProfile:
+    """
+    Lista ordenada de (padrão, horas). O padrão é um glob sem diferenciar
+    maiúsculas; sem curinga vale como prefixo ("pocket3" == "pocket3*").
+    Separadores ("-", "_", " ", ".") valem todos o mesmo, nos dois lados:
+    "my-cam" (o device_key do clockoffset) casa com "my_cam_0001.mp4".
+    Aceita JSON ({"name": ..., "offsets": {"pocket3": 12}}) ou o formato
+    das anotações do tmzcorrect.sh, uma regra por linha:
+
+        # Seul
+        pocket3, +12
+        camera, +23
+    """
+
+    def __init__(self, rules, name=None):
+        self.rules = [(pattern, float(hours)) for pattern, hours in rules]
+        self.name = name
+
+    @staticmethod
+    def _normalize(text):
+        return SEPARATORS.sub("-", text.lower())
+
+    @classmethod
+    def _glob(cls, pattern):
+        pattern = cls._normalize(pattern)
+        return pattern if any(c in pattern for c in "*?[") else pattern + "*"
+
+    def match(self, filename):
+        """
+        Primeira regra que casa com o nome: (padrão, horas) ou None.
+        """
+        name = self._normalize(filename)
+        for pattern, hours in self.rules:
+            if fnmatch.fnmatchcase(name, self._glob(pattern)):
+                return pattern, hours
+        return None
+
+    def offset_for(self, filename):
+        rule = self.match(filename)
+        return rule[1] if rule else None
+
+    @classmethod
+    def parse_rule(cls, text):
+        """
+        "pocket3=+12", "pocket3, +12" ou "pocket3 +12" -> ("pocket3", 12.0)
+        """
+        for sep in ("=", ","):
+            if sep in text:
+                pattern, hours = text.rsplit(sep, 1)
+                break
+        else:
+            # "celular -12"
+            pattern, hours = text.rsplit(None, 1)
+        return pattern.strip(), float(hours.strip())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        if content.lstrip().startswith("{"):
+            data = json.loads(content)
+            return cls(data["offsets"].items(), data.get("name"))
+        rules = []
+        name = None
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("#"):
+                name = name or line.lstrip("# ").strip()
+                continue
+            rules.append(cls.parse_rule(line))
+        return cls(rules, name)
+
+    def to_dict(self):
+        return {"name": self.name, "offsets": dict(self.rules)}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+# --- Engine ---
+class Correction:
+    def __init__(self, path, base, hours, source):
+        self.path = path
+        self.base = base          # timestamp de referência (captura ou arquivo)
+        self.hours = hours
+        self.source = source      # exif, mvhd ou file
+        self.new_time = base + hours * 3600
+
+    def __repr__(self):
+        return f"{self.path}: {self.hours:+g}h ({self.source})"
+
+
+class TimeCorrector:
+    """
+    Substitui o tmzcorrect.sh: aplica o offset do perfil em lote com
+    os.utime, sem abrir processos. A base é a data de captura embutida
+    quando existe, então rodar duas vezes não soma o offset de novo; sem
+    data embutida usa a menor entre criação e modificação do arquivo, como
+    o script fazia (e nesse caso reaplicar soma de novo).
+    """
+
+    def __init__(self, profile, workers=DEFAULT_WORKERS, use_embedded=True):
+        self.profile = profile
+        self.workers = max(1, workers)
+        self.use_embedded = use_embedded
+
+    def _plan_one(self, path):
+        hours = self.profile.offset_for(os.path.basename(path))
+        if hours is None:
+            return None, None
+        try:
+            base, source = reference_time(path, self.use_embedded)
+        except (OSError, ValueError, struct.error) as e:
+            # Arquivo sumiu ou está truncado: fica sem correção, o resto segue
+            return None, e
+        return Correction(path, base, hours, source), None
+
+    def plan(self, paths, errors=None):
+        """
+        Lê as datas em paralelo (é I/O) e retorna as correções na ordem de
+        `paths`. Arquivos ilegíveis ficam de fora e vão para `errors` como
+        (caminho, erro).
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            planned = list(pool.map(self._plan_one, paths))
+        corrections = []
+        for path, (correction, error) in zip(paths, planned):
+            if error is not None:
+                if errors is not None:
+                    errors.append((path, error))
+            elif correction is not None:
+                corrections.append(correction)
+        return corrections
+
+    def apply(self, corrections):
+        """
+        Grava a nova data de modificação (o acesso fica igual). Retorna [(caminho, erro)].
+        """
+        errors = []
+        for c in corrections:
+            try:
+                st = os.stat(c.path)
+                os.utime(c.path, ns=(st.st_atime_ns, int(c.new_time * 1_000_000_000)))
+            except OSError as e:
+                errors.append((c.path, e))
+        return errors
+
+    def correct(self, paths):
+        """
+        Planeja e aplica. Retorna (correções, [(caminho, erro)]), com os erros
+        de leitura e de gravação juntos.
+        """
+        errors = []
+        corrections = self.plan(paths, errors)
+        errors += self.apply(corrections)
+        return corrections, errors
+
+
+def iter_files(folder, ignored=None):
+    """
+    Todos os arquivos da pasta, recursivamente e em ordem.
+    """
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if ignored is None or not ignored(name):
+                yield os.path.join(dirpath, name)
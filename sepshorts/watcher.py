@@ -0,0 +1,250 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+from organizer import is_ignored
+
+DEFAULT_SETTLE_SECONDS = 10
+DEFAULT_POLL_INTERVAL = 2
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """
+    Acesso mínimo ao inotify do Linux via ctypes (sem dependências extras).
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read(self, timeout):
+        """
+        Espera até `timeout` segundos e retorna a lista de (wd, mask, nome).
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Modo daemon: observa pastas e organiza só os arquivos novos, depois que
+    eles param de crescer por `settle` segundos. Usa inotify no Linux e, onde
+    não houver, compara a listagem do nível de cima da pasta a cada intervalo.
+
+    Com `subfolders=True` cada pasta observada é uma área de staging: cada
+    subpasta dela (ex. um dump de cartão) é organizada separadamente.
+    """
+
+    def __init__(self, organizer, roots, subfolders=False,
+                 settle=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.organizer = organizer
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.subfolders = subfolders
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.running = False
+
+        self.libraries = {}   # wd (ou caminho no modo polling) -> pasta observada
+        self.staging = {}     # wd -> pasta de staging (modo subfolders)
+        self.pending = {}     # caminho -> (tamanho, mtime_ns, última mudança)
+        self.known = {}       # pasta -> nomes já vistos (modo polling)
+
+        try:
+            self.inotify = Inotify()
+        except (OSError, AttributeError):
+            self.inotify = None
+
+    # --- Registro de pastas ---
+    def _watch_library(self, folder):
+        if folder in self.libraries.values():
+            return
+        if self.inotify is not None:
+            try:
+                wd = self.inotify.add_watch(folder)
+            except OSError as e:
+                # Pasta temporária que já foi renomeada ou apagada
+                if e.errno != errno.ENOENT:
+                    self.organizer.emit("folder_error", folder=folder, error=str(e))
+                return
+            self.libraries[wd] = folder
+        else:
+            self.libraries[folder] = folder
+            self.known[folder] = set()
+        self.organizer.emit("watching", folder=folder)
+        # Arquivos que já estavam lá (ou chegaram junto com a pasta)
+        self._scan_new(folder)
+
+    def _watch_staging(self, root):
+        if self.inotify is not None:
+            self.staging[self.inotify.add_watch(root)] = root
+        else:
+            self.staging[root] = root
+        for name in sorted(os.listdir(root)):
+            path = os.path.join(root, name)
+            if os.path.isdir(path) and not is_ignored(name):
+                self._watch_library(path)
+
+    def _scan_new(self, folder):
+        try:
+            with os.scandir(folder) as it:
+                names = [entry.name for entry in it if entry.is_file() and not is_ignored(entry.name)]
+        except OSError:
+            return
+        known = self.known.get(folder)
+        for name in names:
+            if known is not None:
+                if name in known:
+                    continue
+                known.add(name)
+            self._touch(os.path.join(folder, name))
+
+    def _touch(self, path):
+        self.pending[path] = (None, None, time.monotonic())
+
+    # --- Eventos ---
+    def _rescan(self):
+        """
+        Varre de novo todas as pastas observadas (e as de staging atrás de
+        subpastas novas). Usado quando a fila do kernel transborda e eventos
+        se perderam; os arquivos passam pela mesma espera de `settle`.
+        """
+        for root in list(self.staging.values()):
+            try:
+                names = os.listdir(root)
+            except OSError:
+                continue
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                if not is_ignored(name) and os.path.isdir(path):
+                    self._watch_library(path)
+        for folder in list(self.libraries.values()):
+            self._scan_new(folder)
+
+    def _handle_inotify(self, timeout):
+        for wd, mask, name in self.inotify.read(timeout):
+            if mask & IN_Q_OVERFLOW:
+                self._rescan()
+                continue
+            if wd in self.staging:
+                if mask & IN_ISDIR and not is_ignored(name):
+                    self._watch_library(os.path.join(self.staging[wd], name))
+                continue
+            folder = self.libraries.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self.libraries[wd]
+                continue
+            # As pastas criadas pelo próprio organizador (360/, Videos/...) não interessam
+            if mask & IN_ISDIR or not name or is_ignored(name):
+                continue
+            self._touch(os.path.join(folder, name))
+
+    def _handle_polling(self):
+        time.sleep(self.poll_interval)
+        self._rescan()
+
+    def _collect_settled(self):
+        """
+        Retorna os arquivos pendentes que pararam de crescer, agrupados por pasta.
+        """
+        now = time.monotonic()
+        settled = {}
+        for path, (size, mtime, changed) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                self.pending[path] = (st.st_size, st.st_mtime_ns, now)
+                continue
+            if now - changed >= self.settle:
+                del self.pending[path]
+                settled.setdefault(os.path.dirname(path), []).append(path)
+        return settled
+
+    def _forget(self, folder, paths):
+        # No modo polling, um nome que saiu da pasta pode voltar como arquivo novo
+        known = self.known.get(folder)
+        if known is not None:
+            for path in paths:
+                if not os.path.exists(path):
+                    known.discard(os.path.basename(path))
+
+    # --- Loop principal ---
+    def run(self):
+        self.running = True
+        for root in self.roots:
+            if self.subfolders:
+                self._watch_staging(root)
+            else:
+                self._watch_library(root)
+
+        try:
+            while self.running:
+                if self.inotify is not None:
+                    self._handle_inotify(self.poll_interval)
+                else:
+                    self._handle_polling()
+
+                for folder, paths in sorted(self._collect_settled().items()):
+                    try:
+                        self.organizer.organize_folder(folder, files=sorted(paths))
+                    except Exception as e:
+                        # Um arquivo ruim ou sem permissão não derruba o daemon
+                        self.organizer.emit("folder_error", folder=folder, error=str(e))
+                    self._forget(folder, paths)
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
+
+    def stop(self):
+        self.running = False
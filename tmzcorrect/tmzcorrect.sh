@@ -1,5 +1,9 @@
 #!/bin/bash
 
+# Versão em Python, em lote e sem depender do macOS:
+#   python sepshorts/cli.py timefix PASTA --profile perfil.txt
+# (o perfil usa o mesmo formato das anotações no fim deste arquivo)
+
 function ajustar_data {
   file=$1
   hours=$2